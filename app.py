@@ -1,25 +1,71 @@
 import streamlit as st
-from github_client import (
-    list_user_repos, get_repo_stats, list_pull_requests, get_file_content,
-    get_repo_topics, add_repo_topics, get_repo_license, update_repo_description, get_repo_summary
+from github_client import list_user_repos, cached_user_repos, prefetch_user_repos
+from app_data import (
+    repo_stats, topics as repo_topics, license_name, update_topics, update_description,
+    pull_requests, new_pull_request, merge_pr, comment_pr,
+    recent_commits, commit_diff, branches as repo_branches, file_tree, search_files, file_content,
+    issues_page, issue_comments, comment_on_issue, open_issue, invalidate
 )
-from pull_request_ops import create_pull_request
-from merge_pr import merge_pull_request
-from review_pr import comment_on_pull_request
-from repo_inspect import list_branches, list_recent_commits, get_commit_diff, get_file_tree
-from issues_client import list_issues, list_issue_comments, add_issue_comment, create_issue
-from mcp_exporter import generate_mcp_context
-from nlp_executor import interpret_command, execute_actions
+from mcp_exporter import generate_mcp_context, refresh_mcp_context, save_mcp_context, CONTEXT_PATH
+from nlp_executor import interpret_command, execute_actions, plan_actions, intent_cache, resolver_stats
+from github_session import cache_stats, scheduler_stats
+from circuit_breaker import describe_breakers
+from object_store import get_store
 import json
 from datetime import datetime
 # Streamlit App
 st.set_page_config(page_title="GitHub MCP", layout="wide")
 
+MUTATING_INTENTS = {"create_pr", "merge_pr", "comment_pr", "create_issue", "comment_issue"}
+VIEWS = ["Natural Language Interface", "Pull Requests", "Issues", "Commits", "Files & Branches", "Repository Metadata"]
+
+
+def show_action_data(intent, params, data):
+    """Render the data returned by one natural-language action"""
+    if intent == "list_items" and params.get("item_type") == "issues":
+        for issue in data:
+            st.write(f"#{issue['number']}: {issue['title']} by {issue['creator']} at {issue['created_at']}")
+    elif intent == "repo_summary":
+        summary = data
+        st.markdown(f"""
+**Repository Summary for {summary['name']}**
+- **Description**: {summary['description']}
+- **Stars**: {summary['stars']}
+- **Forks**: {summary['forks']}
+- **Open Issues**: {summary['open_issues']}
+- **Open PRs**: {summary['open_prs']}
+- **Recent Commits (last 5)**: {summary['recent_commits']}
+- **Topics**: {', '.join(summary['topics'])}
+- **Created**: {summary['created_at']}
+- **Last Updated**: {summary['last_updated']}
+""")
+    else:
+        st.json(data)
+
+
+def show_result(result):
+    """Render a mutation result (dict with message/error or a status string)"""
+    if isinstance(result, dict):
+        if "error" in result:
+            st.error(result["error"])
+        else:
+            st.success(result.get("message", "Done"))
+    elif result.startswith("[ERROR]") or result.startswith("❌"):
+        st.error(result)
+    else:
+        st.success(result)
+
 # Initialize session state
 if "repo" not in st.session_state:
     st.session_state.repo = None
 if "repos" not in st.session_state:
-    st.session_state.repos = list_user_repos()
+    # Start from the list saved by the last run and refresh it in the background
+    cached_repos = cached_user_repos()
+    if cached_repos is None:
+        st.session_state.repos = list_user_repos()
+    else:
+        st.session_state.repos = cached_repos
+        prefetch_user_repos()
 
 # Sidebar: Repository Selection
 st.sidebar.header("Select Repository")
@@ -28,6 +74,20 @@ selected_repo = st.sidebar.selectbox("Choose a repository", repo_names, index=0)
 if selected_repo:
     st.session_state.repo = selected_repo
 
+# API cache counters
+cache = cache_stats()
+st.sidebar.caption(f"API cache: {cache['hits']} hits / {cache['misses']} misses ({cache['entries']} entries)")
+budget = scheduler_stats()
+queued = sum(budget["queue_depth"].values())
+st.sidebar.caption(f"API budget: {budget['remaining']}/{budget['limit']} (reset in {budget['reset_in']}s), {queued} queued, {budget['throttled']} throttled")
+intents = intent_cache.stats()
+st.sidebar.caption(f"Intent cache: {intents['hit_rate']:.0%} hit rate ({intents['memory_hits']} memory / {intents['disk_hits']} disk / {intents['misses']} misses)")
+tiers = resolver_stats.stats()
+st.sidebar.caption("Intent tiers: " + ", ".join(f"{name} {t['hits']} ({t['avg_ms']} ms)" for name, t in tiers.items() if t["hits"]))
+objects = get_store().stats()
+st.sidebar.caption(f"Object store: {objects['hit_rate']:.0%} hit rate ({objects['hits']} hits / {objects['misses']} misses, {objects['evicted']} evicted)")
+st.sidebar.caption(f"Backends: {describe_breakers()}")
+
 # Main Content
 st.title("GitHub MCP: AI-Powered Repository Management")
 st.markdown("Interact with your GitHub repositories using natural language commands powered by an LLM.")
@@ -38,19 +98,19 @@ if st.session_state.repo:
     
     # Display Repo Stats
     with st.expander("Repository Stats", expanded=True):
-        stats = get_repo_stats(repo)
+        stats = repo_stats(repo)
         cols = st.columns(4)
         cols[0].metric("Stars", stats.get("stars", 0))
         cols[1].metric("Forks", stats.get("forks", 0))
         cols[2].metric("Open Issues", stats.get("open_issues", 0))
         cols[3].metric("Watchers", stats.get("watchers", 0))
     
-    # Tabs for different views
-    tab1, tab2, tab3, tab4, tab5 = st.tabs(["Natural Language Interface", "Pull Requests", "Issues", "Commits", "Files & Branches"])
-    
-    with tab1:
+    # Only the selected view runs, so only its data is fetched
+    view = st.radio("View", VIEWS, horizontal=True, key="view", label_visibility="collapsed")
+
+    if view == "Natural Language Interface":
         st.subheader("Natural Language Commands")
-        st.markdown("Enter commands like: 'Create a pull request from dev to main with title \"New Feature\"', 'List open issues', 'Comment on issue #5 with \"Looks good\"', 'View commit abc123', or 'Give me a summary of the repo'.")
+        st.markdown("Enter commands like: 'Create a pull request from dev to main with title \"New Feature\"', 'List open issues', 'Comment on issue #5 with \"Looks good\"', 'View commit abc123', or 'Give me a summary of the repo'. Combine steps with 'and' / 'then', e.g. 'Create issue with title \"Bug\" then list open issues'.")
         command = st.text_input("Enter your command:")
         if st.button("Execute Command"):
             if command:
@@ -59,35 +119,33 @@ if st.session_state.repo:
                     if "error" in structured:
                         st.error(structured["error"])
                     else:
+                        actions = plan_actions(structured)
                         result = execute_actions(structured, repo)
-                        if "error" in result:
+                        if any(a["intent"] in MUTATING_INTENTS for a in actions):
+                            invalidate(repo)
+                        if "actions" in structured:
+                            st.info(f"{result['message']} in {result['elapsed_ms']} ms")
+                            for step in result["data"]:
+                                label = f"Step {step['step']}: {step['intent']} ({step['elapsed_ms']} ms)"
+                                if step["depends_on"]:
+                                    label += f", after step {', '.join(map(str, step['depends_on']))}"
+                                st.markdown(f"**{label}**")
+                                if "error" in step:
+                                    st.error(step["error"])
+                                else:
+                                    st.success(step["message"])
+                                    if "data" in step:
+                                        show_action_data(step["intent"], step["params"], step["data"])
+                        elif "error" in result:
                             st.error(result["error"])
                         else:
                             st.success(result["message"])
                             if "data" in result:
-                                if structured.get("intent") == "list_items" and structured.get("params", {}).get("item_type") == "issues":
-                                    for issue in result["data"]:
-                                        st.write(f"#{issue['number']}: {issue['title']} by {issue['creator']} at {issue['created_at']}")
-                                elif structured.get("intent") == "repo_summary":
-                                    summary = result["data"]
-                                    st.markdown(f"""
-**Repository Summary for {summary['name']}**
-- **Description**: {summary['description']}
-- **Stars**: {summary['stars']}
-- **Forks**: {summary['forks']}
-- **Open Issues**: {summary['open_issues']}
-- **Open PRs**: {summary['open_prs']}
-- **Recent Commits (last 5)**: {summary['recent_commits']}
-- **Topics**: {', '.join(summary['topics'])}
-- **Created**: {summary['created_at']}
-- **Last Updated**: {summary['last_updated']}
-""")
-                                else:
-                                    st.json(result["data"])
+                                show_action_data(structured.get("intent"), structured.get("params", {}), result["data"])
     
-    with tab2:
+    elif view == "Pull Requests":
         st.subheader("Pull Requests")
-        prs = list_pull_requests(repo)
+        prs = pull_requests(repo)
         if not prs:
             st.write("No open pull requests.")
         else:
@@ -101,11 +159,7 @@ if st.session_state.repo:
             title = st.text_input("PR Title")
             body = st.text_area("PR Description (optional)")
             if st.form_submit_button("Create PR"):
-                result = create_pull_request(repo, base, head, title, body)
-                if "error" in result:
-                    st.error(result["error"])
-                else:
-                    st.success(result["message"])
+                show_result(new_pull_request(repo, base, head, title, body))
         
         if prs:
             with st.form("merge_pr_form"):
@@ -113,71 +167,63 @@ if st.session_state.repo:
                 pr_num = st.selectbox("Select PR to merge", [num for num, _ in prs])
                 merge_message = st.text_input("Merge commit message", "Merged via MCP")
                 if st.form_submit_button("Merge PR"):
-                    result = merge_pull_request(repo, pr_num, merge_message)
-                    if "error" in result:
-                        st.error(result["error"])
-                    else:
-                        st.success(result["message"])
+                    show_result(merge_pr(repo, pr_num, merge_message))
             
             with st.form("comment_pr_form"):
                 st.markdown("### Comment on Pull Request")
                 pr_num = st.selectbox("Select PR to comment", [num for num, _ in prs], key="comment_pr_select")
                 comment = st.text_area("Comment")
                 if st.form_submit_button("Add Comment"):
-                    result = comment_on_pull_request(repo, pr_num, comment)
-                    if "error" in result:
-                        st.error(result["error"])
-                    else:
-                        st.success(result["message"])
+                    show_result(comment_pr(repo, pr_num, comment))
     
-    with tab3:
+    elif view == "Issues":
         st.subheader("Issues")
-        open_issues = list_issues(repo, state="open")
-        closed_issues = list_issues(repo, state="closed")
-        
-        st.markdown("### Open Issues")
-        if not open_issues:
-            st.write("No open issues.")
-        else:
-            for issue in open_issues:
+
+        def render_issues(state):
+            """One page of issues; comments load only when an issue's toggle is switched on"""
+            page_key = f"issues_page_{state}"
+            page = st.session_state.get(page_key, 1)
+            issues, has_next = issues_page(repo, state, page)
+            if isinstance(issues, str):
+                st.error(issues)
+                return []
+            if not issues:
+                st.write(f"No {state} issues.")
+            for issue in issues:
                 with st.expander(f"#{issue['number']}: {issue['title']} by {issue['creator']} at {issue['created_at']}"):
-                    comments = list_issue_comments(repo, issue['number'])
-                    if isinstance(comments, str):
-                        st.error(comments)
-                    elif not comments:
-                        st.write("No comments yet.")
-                    else:
-                        st.markdown("#### Comments")
-                        for c in comments:
-                            st.write(f"- {c['user']} at {c['created_at']}: {c['body']}")
-        
+                    if st.toggle("Show comments", key=f"comments_{state}_{issue['number']}"):
+                        comments = issue_comments(repo, issue['number'])
+                        if isinstance(comments, str):
+                            st.error(comments)
+                        elif not comments:
+                            st.write("No comments yet.")
+                        else:
+                            st.markdown("#### Comments")
+                            for c in comments:
+                                st.write(f"- {c['user']} at {c['created_at']}: {c['body']}")
+            prev_col, label_col, next_col = st.columns([1, 2, 1])
+            if prev_col.button("← Previous", key=f"prev_{state}", disabled=page <= 1):
+                st.session_state[page_key] = page - 1
+                st.rerun()
+            label_col.caption(f"Page {page}")
+            if next_col.button("Next →", key=f"next_{state}", disabled=not has_next):
+                st.session_state[page_key] = page + 1
+                st.rerun()
+            return issues
+
+        st.markdown("### Open Issues")
+        open_issues = render_issues("open")
+
         st.markdown("### Closed Issues")
-        if not closed_issues:
-            st.write("No closed issues.")
-        else:
-            for issue in closed_issues:
-                with st.expander(f"#{issue['number']}: {issue['title']} by {issue['creator']} at {issue['created_at']}"):
-                    comments = list_issue_comments(repo, issue['number'])
-                    if isinstance(comments, str):
-                        st.error(comments)
-                    elif not comments:
-                        st.write("No comments yet.")
-                    else:
-                        st.markdown("#### Comments")
-                        for c in comments:
-                            st.write(f"- {c['user']} at {c['created_at']}: {c['body']}")
-        
+        closed_issues = render_issues("closed")
+
         with st.form("create_issue_form"):
             st.markdown("### Create Issue")
             issue_title = st.text_input("Issue Title")
             issue_body = st.text_area("Issue Description")
             if st.form_submit_button("Create Issue"):
-                result = create_issue(repo, issue_title, issue_body)
-                if "error" in result:
-                    st.error(result["error"])
-                else:
-                    st.success(result["message"])
-        
+                show_result(open_issue(repo, issue_title, issue_body))
+
         with st.form("comment_issue_form"):
             st.markdown("### Comment on Issue")
             issue_numbers = [issue['number'] for issue in open_issues + closed_issues]
@@ -187,22 +233,20 @@ if st.session_state.repo:
                 issue_num = st.selectbox("Select Issue", issue_numbers)
                 comment = st.text_area("Issue Comment")
                 if st.form_submit_button("Add Comment"):
-                    result = add_issue_comment(repo, issue_num, comment)
-                    if "error" in result:
-                        st.error(result["error"])
-                    else:
-                        st.success(result["message"])
-    
-    with tab4:
+                    show_result(comment_on_issue(repo, issue_num, comment))
+
+    elif view == "Commits":
         st.subheader("Commits")
-        commits = list_recent_commits(repo)
+        commits = recent_commits(repo)
         if isinstance(commits, str):
             st.error(commits)
         else:
             for c in commits:
                 with st.expander(f"{c['sha'][:7]} | {c['author']} | {c['date']} | {c['message']}"):
+                    # Diffs are only fetched when asked for, cut at GITHUB_PATCH_MAX_BYTES per file
+                    show_patches = st.checkbox("Include diffs", key=f"patches_{c['sha']}")
                     if st.button("View Details", key=f"commit_{c['sha']}"):
-                        summary = get_commit_diff(repo, c['sha'])
+                        summary = commit_diff(repo, c['sha'], patches=show_patches)
                         if isinstance(summary, str):
                             st.error(summary)
                         else:
@@ -214,15 +258,19 @@ if st.session_state.repo:
                             st.markdown("**Files Changed**:")
                             for f in summary["files_changed"]:
                                 st.write(f"- {f['filename']} (+{f['additions']}/-{f['deletions']})")
+                                if f.get("patch"):
+                                    st.code(f["patch"], language="diff")
+                                    if f["patch_truncated"]:
+                                        st.caption("Diff truncated")
     
-    with tab5:
+    elif view == "Files & Branches":
         st.subheader("Files & Branches")
-        branches = list_branches(repo)
+        branches = repo_branches(repo)
         if isinstance(branches, str):
             st.error(branches)
         else:
             selected_branch = st.selectbox("Select Branch", branches, key="file_branch")
-            tree = get_file_tree(repo, branch=selected_branch)
+            tree = file_tree(repo, selected_branch)
             if isinstance(tree, str):
                 st.error(tree)
             elif not tree:
@@ -232,19 +280,28 @@ if st.session_state.repo:
                 for item in tree:
                     emoji = "📄" if item["type"] == "file" else "📁"
                     st.write(f"{emoji} {item['path']}")
+
+                query = st.text_input("Search files (glob like 'src/*.py', extension like '.md', or folder)")
+                if query:
+                    matches = search_files(repo, selected_branch, query)
+                    if isinstance(matches, str):
+                        st.error(matches)
+                    else:
+                        st.caption(f"{len(matches)} files")
+                        st.code("\n".join(matches[:500]) or "No matches.", language="text")
                 
                 file_path = st.text_input("Enter file path to view content")
                 if st.button("View File Content"):
-                    content = get_file_content(repo, file_path, branch=selected_branch)
+                    content = file_content(repo, file_path, selected_branch)
                     if isinstance(content, str):
                         st.code(content[:1000], language="text")
                     else:
                         st.error("Could not retrieve file content.")
     
-    # Topics and License
-    with st.expander("Repository Metadata"):
+    elif view == "Repository Metadata":
+        # Topics and License
         st.markdown("### Topics")
-        topics = get_repo_topics(repo)
+        topics = repo_topics(repo)
         if isinstance(topics, str):
             st.error(topics)
         else:
@@ -254,24 +311,16 @@ if st.session_state.repo:
         if st.button("Update Topics"):
             if new_topics:
                 new_topics_list = [t.strip() for t in new_topics.split(",") if t.strip()]
-                result = add_repo_topics(repo, new_topics_list)
-                if "error" in result:
-                    st.error(result["error"])
-                else:
-                    st.success(result["message"])
+                show_result(update_topics(repo, new_topics_list))
         
         st.markdown("### License")
-        license_info = get_repo_license(repo)
+        license_info = license_name(repo)
         st.write(license_info)
         
         st.markdown("### Description")
         new_desc = st.text_area("Update repository description", stats.get("description", ""))
         if st.button("Update Description"):
-            result = update_repo_description(repo, new_desc)
-            if "error" in result:
-                st.error(result["error"])
-            else:
-                st.success(result["message"])
+            show_result(update_description(repo, new_desc))
     
     # MCP Context File
     if st.button("Generate MCP Context File (mcp.json)"):
@@ -279,9 +328,8 @@ if st.session_state.repo:
         if "error" in mcp:
             st.error(f"Failed to generate MCP context: {mcp['error']}")
         else:
-            with open("mcp.json", "w") as f:
-                json.dump(mcp, f, indent=4)
-            st.success("MCP context file saved as mcp.json")
+            save_mcp_context(mcp, CONTEXT_PATH)
+            st.success(f"MCP context file saved as {CONTEXT_PATH}")
             st.download_button(
                 label="Download mcp.json",
                 data=json.dumps(mcp, indent=4),
@@ -289,5 +337,12 @@ if st.session_state.repo:
                 mime="application/json"
             )
 
+    if st.button("Refresh MCP Context File (incremental)"):
+        mcp = refresh_mcp_context(repo, CONTEXT_PATH)
+        if "error" in mcp:
+            st.error(f"Failed to refresh MCP context: {mcp['error']}")
+        else:
+            st.success(f"MCP context refreshed at {mcp['sync']['refreshed_at']}")
+
 else:
     st.warning("Please select a repository from the sidebar.")
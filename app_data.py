@@ -0,0 +1,155 @@
+# app_data.py
+import os
+from ttl_cache import TTLCache
+from file_reader import PREVIEW_BYTES
+from github_client import (
+    get_repo_stats, list_pull_requests, get_file_content,
+    get_repo_topics, add_repo_topics, get_repo_license, update_repo_description
+)
+from pull_request_ops import create_pull_request
+from merge_pr import merge_pull_request
+from review_pr import comment_on_pull_request
+from repo_inspect import list_branches, list_recent_commits, get_commit_diff, get_file_tree, find_files
+from issues_client import list_issues_page, list_issue_comments, add_issue_comment, create_issue
+
+# Results survive Streamlit reruns for APP_CACHE_TTL seconds; mutations invalidate them early
+APP_CACHE_TTL = int(os.getenv("APP_CACHE_TTL", "120"))
+ISSUES_PER_PAGE = int(os.getenv("APP_ISSUES_PER_PAGE", "20"))
+
+_cache = TTLCache(ttl=APP_CACHE_TTL, max_entries=4096)
+
+
+def _is_error(value):
+    if isinstance(value, dict):
+        return "error" in value
+    return isinstance(value, str) and (value.startswith("[ERROR]") or value.startswith("❌"))
+
+
+def cached(repo_name, key, loader, ttl=None):
+    """Memoize loader() per repo; error strings are returned but never cached"""
+    full_key = f"{repo_name.lower()}:{key}"
+    value = _cache.get(full_key)
+    if value is None:
+        value = loader()
+        failed = _is_error(value) or (isinstance(value, tuple) and _is_error(value[0]))
+        if not failed:
+            _cache.set(full_key, value, ttl)
+    return value
+
+
+def invalidate(repo_name, *prefixes):
+    """Drop cached entries of repo_name whose key starts with any prefix (all entries if none)"""
+    for prefix in prefixes or ("",):
+        _cache.invalidate_prefix(f"{repo_name.lower()}:{prefix}")
+
+
+# --- Header / metadata ---------------------------------------------------
+
+def repo_stats(repo_name):
+    return cached(repo_name, "stats", lambda: get_repo_stats(repo_name))
+
+
+def topics(repo_name):
+    return cached(repo_name, "topics", lambda: get_repo_topics(repo_name))
+
+
+def license_name(repo_name):
+    return cached(repo_name, "license", lambda: get_repo_license(repo_name), ttl=3600)
+
+
+def update_topics(repo_name, new_topics):
+    result = add_repo_topics(repo_name, new_topics)
+    invalidate(repo_name, "topics")
+    return result
+
+
+def update_description(repo_name, description):
+    result = update_repo_description(repo_name, description)
+    invalidate(repo_name, "stats")
+    return result
+
+
+# --- Pull requests tab ---------------------------------------------------
+
+def pull_requests(repo_name):
+    return cached(repo_name, "pulls", lambda: list_pull_requests(repo_name))
+
+
+def new_pull_request(repo_name, base, head, title, body):
+    result = create_pull_request(repo_name, base, head, title, body)
+    invalidate(repo_name, "pulls")
+    return result
+
+
+def merge_pr(repo_name, pr_number, message):
+    result = merge_pull_request(repo_name, pr_number, message)
+    # A merge closes the PR and moves the base branch
+    invalidate(repo_name, "pulls", "commits", "tree:", "file:", "stats")
+    return result
+
+
+def comment_pr(repo_name, pr_number, body):
+    return comment_on_pull_request(repo_name, pr_number, body)
+
+
+# --- Commits tab ---------------------------------------------------------
+
+def recent_commits(repo_name):
+    return cached(repo_name, "commits", lambda: list_recent_commits(repo_name))
+
+
+def commit_diff(repo_name, sha, patches=False):
+    # A commit never changes, keep it until evicted
+    key = f"diff:{sha}:patches" if patches else f"diff:{sha}"
+    return cached(repo_name, key, lambda: get_commit_diff(repo_name, sha, patches=patches), ttl=0)
+
+
+# --- Files & branches tab ------------------------------------------------
+
+def branches(repo_name):
+    return cached(repo_name, "branches", lambda: list_branches(repo_name))
+
+
+def file_tree(repo_name, branch):
+    return cached(repo_name, f"tree:{branch}", lambda: get_file_tree(repo_name, branch=branch))
+
+
+def search_files(repo_name, branch, query):
+    """'src/*.py' is a glob, '.md' an extension, anything else a directory prefix"""
+    if any(c in query for c in "*?["):
+        loader = lambda: find_files(repo_name, branch, pattern=query)
+    elif query.startswith("."):
+        loader = lambda: find_files(repo_name, branch, extension=query)
+    else:
+        loader = lambda: find_files(repo_name, branch, prefix=query)
+    return cached(repo_name, f"tree:{branch}:find:{query}", loader)
+
+
+def file_content(repo_name, path, branch):
+    return cached(repo_name, f"file:{branch}:{path}", lambda: get_file_content(repo_name, path, branch=branch, max_bytes=PREVIEW_BYTES))
+
+
+# --- Issues tab ----------------------------------------------------------
+
+def issues_page(repo_name, state, page):
+    return cached(repo_name, f"issues:{state}:{page}",
+                  lambda: list_issues_page(repo_name, state, page, ISSUES_PER_PAGE))
+
+
+def issue_comments(repo_name, issue_number):
+    return cached(repo_name, f"comments:{issue_number}",
+                  lambda: list_issue_comments(repo_name, issue_number))
+
+
+def comment_on_issue(repo_name, issue_number, body):
+    result = add_issue_comment(repo_name, issue_number, body)
+    if not _is_error(result):
+        invalidate(repo_name, f"comments:{issue_number}")
+    return result
+
+
+def open_issue(repo_name, title, body):
+    result = create_issue(repo_name, title, body)
+    if "error" not in result:
+        invalidate(repo_name, "issues:", "stats")
+    return result
@@ -0,0 +1,81 @@
+# bench_context_format.py
+"""
+Compare the classic pretty-printed mcp.json with the section-indexed .mcpx format.
+
+    python bench_context_format.py [items_per_section] [repeats]
+
+Reports file size, full-load time and single-section load time for each variant.
+"""
+import json
+import os
+import sys
+import tempfile
+import time
+
+from context_format import msgpack, read_context, read_section, write_context
+
+
+def synthetic_context(n):
+    return {
+        "@context": "https://modelcontextprotocol.io/context/v1",
+        "modelcontext": {
+            "repository": {"name": "org/monorepo", "description": "benchmark", "stars": 1, "forks": 1,
+                           "topics": ["bench"], "created_at": "2020-01-01", "updated_at": "2024-01-01"},
+            "contributors": [{"login": f"user{i}", "html_url": f"https://github.com/user{i}",
+                              "contributions": i} for i in range(n)],
+            "recent_commits": [{"sha": f"{i:040x}", "author": f"user{i % 50}",
+                                "message": f"Fix module {i} edge case", "date": "2024-01-01"} for i in range(n)],
+            "open_issues": [{"number": i, "title": f"Issue {i} fails on startup", "created_at": "2024-01-01",
+                             "user": f"user{i % 50}"} for i in range(n)],
+            "closed_issues": [{"number": n + i, "title": f"Closed issue {i}", "created_at": "2023-01-01",
+                               "closed_at": "2023-02-01", "user": f"user{i % 50}"} for i in range(n)],
+            "issue_comments": [{"issue_number": i, "comment_body": "Looks good to me " * 10,
+                                "commenter": f"user{i % 50}", "created_at": "2024-01-01"} for i in range(n)],
+            "open_pull_requests": [{"number": 2 * n + i, "title": f"PR {i}", "created_at": "2024-01-01",
+                                    "user": f"user{i % 50}"} for i in range(n)],
+        }
+    }
+
+
+def timed(fn, repeats):
+    start = time.perf_counter()
+    for _ in range(repeats):
+        fn()
+    return (time.perf_counter() - start) / repeats * 1000
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    mcp = synthetic_context(n)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        baseline = os.path.join(tmp, "mcp.json")
+        with open(baseline, "w") as f:
+            json.dump(mcp, f, indent=4)
+
+        def load_json():
+            with open(baseline, "r") as f:
+                return json.load(f)
+
+        rows = [("mcp.json (indent=4)", os.path.getsize(baseline),
+                 timed(load_json, repeats), timed(load_json, repeats))]
+
+        variants = [("mcpx json", "json", False), ("mcpx json+zlib", "json", True)]
+        if msgpack is not None:
+            variants += [("mcpx msgpack", "msgpack", False), ("mcpx msgpack+zlib", "msgpack", True)]
+        for label, codec, compress in variants:
+            path = os.path.join(tmp, f"{codec}{int(compress)}.mcpx")
+            write_context(mcp, path, codec=codec, compress=compress)
+            rows.append((label, os.path.getsize(path),
+                         timed(lambda: read_context(path), repeats),
+                         timed(lambda: read_section(path, "open_issues"), repeats)))
+
+    print(f"{n} items per section, {repeats} repeats")
+    print(f"{'format':<22}{'size (KB)':>12}{'full load (ms)':>16}{'one section (ms)':>18}")
+    for label, size, full, one in rows:
+        print(f"{label:<22}{size / 1024:>12.1f}{full:>16.2f}{one:>18.2f}")
+
+
+if __name__ == "__main__":
+    main()
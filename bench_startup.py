@@ -0,0 +1,73 @@
+# bench_startup.py
+"""
+Measure startup cost of the CLI and the modules behind the Streamlit app.
+
+    python bench_startup.py [repeats]
+
+Reports the median import time of each entry module (fresh interpreter per run)
+and main.py's time to first prompt. The prompt timing needs GITHUB_TOKEN; with a
+warm repo list under MCP_CACHE_DIR it does not wait for GitHub.
+"""
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+from github_client import REPO_LIST_PATH
+
+MODULES = ["github_session", "github_client", "nlp_executor", "app_data", "mcp_exporter", "llm_agent"]
+PROMPT = b"Enter keyword or exact repo name"
+
+
+def import_ms(module):
+    code = (
+        "import time, sys\n"
+        "t = time.perf_counter()\n"
+        f"import {module}\n"
+        "print((time.perf_counter() - t) * 1000, 'github' in sys.modules)"
+    )
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout.split()
+    return float(out[0]), out[1] == "True"
+
+
+def first_prompt_ms(timeout=60):
+    """Seconds from spawning main.py until its first input() prompt is printed"""
+    started = time.perf_counter()
+    proc = subprocess.Popen([sys.executable, "-u", "main.py"], stdin=subprocess.PIPE,
+                            stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+    seen = b""
+    try:
+        while PROMPT not in seen:
+            chunk = proc.stdout.read1(4096)
+            if not chunk or time.perf_counter() - started > timeout:
+                return None
+            seen += chunk
+        return (time.perf_counter() - started) * 1000
+    finally:
+        proc.kill()
+        proc.wait()
+
+
+def main():
+    repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+
+    print(f"{'module':<18}{'import (ms)':>14}{'loads PyGithub':>16}")
+    for module in MODULES:
+        runs = [import_ms(module) for _ in range(repeats)]
+        print(f"{module:<18}{statistics.median(ms for ms, _ in runs):>14.1f}{str(runs[0][1]):>16}")
+
+    if not os.getenv("GITHUB_TOKEN"):
+        print("\nGITHUB_TOKEN not set: skipping time to first prompt")
+        return
+    warm = os.path.exists(REPO_LIST_PATH)
+    runs = [first_prompt_ms() for _ in range(repeats)]
+    runs = [ms for ms in runs if ms is not None]
+    if runs:
+        print(f"\nmain.py time to first prompt ({'warm' if warm else 'cold'} repo list): {statistics.median(runs):.1f} ms")
+    else:
+        print("\nmain.py did not reach its first prompt")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+# circuit_breaker.py
+import threading
+import time
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+_registry = {}
+_registry_lock = threading.Lock()
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a backend whose breaker is open"""
+
+
+class CircuitBreaker:
+    """
+    Stops calling a backend after failure_threshold consecutive failures.
+
+    While open, allow() answers False without touching the network. After
+    reset_timeout seconds one probe call is let through (half-open): success
+    closes the breaker, failure re-opens it for another reset_timeout.
+    """
+
+    def __init__(self, name, failure_threshold=5, reset_timeout=30.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probing = False
+        self.short_circuited = 0
+        self.trips = 0
+
+    def allow(self):
+        """True if a call may go out now; in half-open state only one probe is in flight"""
+        with self._lock:
+            if self.state == OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = HALF_OPEN
+                self._probing = False
+            if self.state == CLOSED:
+                return True
+            if self.state == HALF_OPEN and not self._probing:
+                self._probing = True
+                return True
+            self.short_circuited += 1
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = CLOSED
+            self.failures = 0
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != OPEN:
+                    self.trips += 1
+                self.state = OPEN
+                self.opened_at = time.monotonic()
+            self._probing = False
+
+    def release(self):
+        """End a call that says nothing about backend health (e.g. a local error)"""
+        with self._lock:
+            self._probing = False
+
+    def retry_in(self):
+        """Seconds until the next probe is allowed (0 unless open)"""
+        with self._lock:
+            if self.state != OPEN:
+                return 0
+            return max(round(self.reset_timeout - (time.monotonic() - self.opened_at), 1), 0)
+
+    def stats(self):
+        retry_in = self.retry_in()
+        with self._lock:
+            return {
+                "state": self.state,
+                "failures": self.failures,
+                "retry_in": retry_in,
+                "trips": self.trips,
+                "short_circuited": self.short_circuited,
+            }
+
+
+def get_breaker(name, failure_threshold=5, reset_timeout=30.0):
+    """Return the process-wide breaker for a backend, creating it on first use"""
+    with _registry_lock:
+        if name not in _registry:
+            _registry[name] = CircuitBreaker(name, failure_threshold, reset_timeout)
+        return _registry[name]
+
+
+def breaker_stats():
+    """State and counters of every breaker created so far"""
+    with _registry_lock:
+        breakers = list(_registry.values())
+    return {b.name: b.stats() for b in breakers}
+
+
+def describe_breakers():
+    """One-line summary such as 'github: closed, llm: open (probe in 12.0s)'"""
+    parts = []
+    for name, s in sorted(breaker_stats().items()):
+        if s["state"] == OPEN:
+            parts.append(f"{name}: open (probe in {s['retry_in']}s)")
+        else:
+            parts.append(f"{name}: {s['state'].replace('_', '-')}")
+    return ", ".join(parts) or "no backends called yet"
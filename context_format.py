@@ -0,0 +1,128 @@
+# context_format.py
+"""
+Section-indexed on-disk format for MCP contexts (".mcpx").
+
+Layout:
+    MAGIC | uint32 header length | header JSON | section blobs
+
+The header holds the codec, the compression, the top-level keys other than
+"modelcontext" and an offset table {section: [offset, length]} relative to the
+end of the header, so a reader can seek straight to one section and decode only it.
+Plain JSON files (the classic mcp.json) are still read transparently.
+"""
+import json
+import os
+import struct
+import zlib
+
+try:
+    import msgpack
+except ImportError:  # optional codec
+    msgpack = None
+
+MAGIC = b"MCPX1\n"
+_LENGTH = struct.Struct(">I")
+
+
+def _encode(value, codec):
+    if codec == "msgpack":
+        if msgpack is None:
+            raise ValueError("msgpack codec requested but the msgpack package is not installed")
+        return msgpack.packb(value, use_bin_type=True)
+    return json.dumps(value, separators=(",", ":")).encode("utf-8")
+
+
+def _decode(blob, codec):
+    if codec == "msgpack":
+        if msgpack is None:
+            raise ValueError("msgpack codec requested but the msgpack package is not installed")
+        return msgpack.unpackb(blob, raw=False)
+    return json.loads(blob)
+
+
+def is_indexed(path):
+    """True if path holds the section-indexed format"""
+    with open(path, "rb") as f:
+        return f.read(len(MAGIC)) == MAGIC
+
+
+def write_context(mcp, path, codec="json", compress=False):
+    """Write an MCP context in the section-indexed format (atomically)"""
+    sections = mcp.get("modelcontext", {})
+    blobs, table, offset = [], {}, 0
+    for name, value in sections.items():
+        blob = _encode(value, codec)
+        if compress:
+            blob = zlib.compress(blob)
+        table[name] = [offset, len(blob)]
+        blobs.append(blob)
+        offset += len(blob)
+
+    header = json.dumps({
+        "codec": codec,
+        "compression": "zlib" if compress else None,
+        "meta": {k: v for k, v in mcp.items() if k != "modelcontext"},
+        "sections": table,
+    }, separators=(",", ":")).encode("utf-8")
+
+    tmp = f"{path}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(MAGIC)
+        f.write(_LENGTH.pack(len(header)))
+        f.write(header)
+        for blob in blobs:
+            f.write(blob)
+    os.replace(tmp, path)
+
+
+def _read_header(f):
+    if f.read(len(MAGIC)) != MAGIC:
+        raise ValueError("not a section-indexed MCP context")
+    (length,) = _LENGTH.unpack(f.read(_LENGTH.size))
+    header = json.loads(f.read(length))
+    return header, len(MAGIC) + _LENGTH.size + length
+
+
+def _read_blob(f, header, base, name):
+    offset, length = header["sections"][name]
+    f.seek(base + offset)
+    blob = f.read(length)
+    if header.get("compression") == "zlib":
+        blob = zlib.decompress(blob)
+    return _decode(blob, header["codec"])
+
+
+def list_sections(path):
+    with open(path, "rb") as f:
+        header, _ = _read_header(f)
+    return list(header["sections"])
+
+
+def read_section(path, name, default=None):
+    """Decode a single section; plain JSON files are parsed in full as a fallback"""
+    with open(path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            f.seek(0)
+            return json.load(f).get("modelcontext", {}).get(name, default)
+        f.seek(0)
+        header, base = _read_header(f)
+        if name not in header["sections"]:
+            return default
+        return _read_blob(f, header, base, name)
+
+
+def read_context(path, sections=None):
+    """
+    Load an MCP context in either format.
+    sections limits which modelcontext sections are decoded (indexed format only).
+    """
+    with open(path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            f.seek(0)
+            return json.load(f)
+        f.seek(0)
+        header, base = _read_header(f)
+        names = header["sections"] if sections is None else [n for n in sections if n in header["sections"]]
+        mcp = dict(header["meta"])
+        mcp["modelcontext"] = {name: _read_blob(f, header, base, name) for name in names}
+        return mcp
@@ -0,0 +1,153 @@
+# context_store.py
+import bisect
+import os
+import re
+import threading
+from context_format import is_indexed, read_context, read_section
+
+_TOKEN = re.compile(r"[a-z0-9_\-.]+")
+
+# Words too common in questions to narrow a keyword search
+STOPWORDS = {
+    "a", "an", "the", "is", "are", "was", "of", "in", "on", "to", "for", "and", "or",
+    "what", "which", "who", "show", "me", "about", "any", "with", "by", "this", "repo",
+}
+
+
+def tokenize(text):
+    return [t for t in _TOKEN.findall((text or "").lower()) if t not in STOPWORDS]
+
+
+class ContextStore:
+    """
+    Long-lived, indexed view of an MCP context file (plain JSON or section-indexed).
+    The file is re-read only when its mtime or size changes. Sections are decoded
+    on first use and each index is built only when a lookup needs it.
+    """
+
+    def __init__(self, path="mcp.json"):
+        self.path = path
+        self._lock = threading.RLock()
+        self._signature = None
+        self.error = None
+        self._reset()
+
+    def _reset(self):
+        self._sections = {}
+        self._indexed = None
+        self._full = None
+        self._indexes = {}
+
+    def refresh(self):
+        """Drop cached sections and indexes if the file changed since the last load"""
+        try:
+            st = os.stat(self.path)
+            signature = (st.st_mtime_ns, st.st_size)
+        except OSError as e:
+            with self._lock:
+                self._reset()
+                self._signature, self.error = None, str(e)
+            return
+        if signature == self._signature:
+            return
+        with self._lock:
+            if signature == self._signature:
+                return
+            self._reset()
+            self.error = None
+            try:
+                self._indexed = is_indexed(self.path)
+                if not self._indexed:
+                    self._full = read_context(self.path)
+                    self.error = self._full.get("error")
+            except Exception as e:
+                self.error = str(e)
+            self._signature = signature
+
+    def section(self, name):
+        """Return one modelcontext section, decoding only that section when the format allows"""
+        self.refresh()
+        with self._lock:
+            if name not in self._sections:
+                default = {} if name == "repository" else []
+                try:
+                    if self._full is not None:
+                        value = self._full.get("modelcontext", {}).get(name, default)
+                    elif self._indexed:
+                        value = read_section(self.path, name, default)
+                    else:
+                        value = default
+                except Exception as e:
+                    self.error, value = str(e), default
+                self._sections[name] = value
+            return self._sections[name]
+
+    def _index(self, name, build):
+        self.refresh()
+        with self._lock:
+            if name not in self._indexes:
+                self._indexes[name] = build()
+            return self._indexes[name]
+
+    def _build_issues(self):
+        return {
+            issue["number"]: issue
+            for name in ("open_issues", "closed_issues")
+            for issue in self.section(name)
+        }
+
+    def _build_commits(self):
+        by_author, by_sha = {}, {}
+        for commit in self.section("recent_commits"):
+            by_author.setdefault(commit.get("author", "").lower(), []).append(commit)
+            by_sha[commit["sha"]] = commit
+        return {"by_author": by_author, "by_sha": by_sha, "shas": sorted(by_sha)}
+
+    def _build_contributors(self):
+        return {c["login"].lower(): c for c in self.section("contributors")}
+
+    def _build_keywords(self):
+        keywords = {}
+        fields = {
+            "open_issues": ("title", "user"),
+            "closed_issues": ("title", "user"),
+            "recent_commits": ("message", "author"),
+            "contributors": ("login",),
+            "open_pull_requests": ("title", "user"),
+            "issue_comments": ("comment_body", "commenter"),
+        }
+        for name, keys in fields.items():
+            for pos, item in enumerate(self.section(name)):
+                for key in keys:
+                    for token in tokenize(item.get(key)):
+                        keywords.setdefault(token, set()).add((name, pos))
+        return keywords
+
+    def issue(self, number):
+        return self._index("issues", self._build_issues).get(number)
+
+    def commit(self, sha_prefix):
+        """Find a commit by full SHA or unique prefix"""
+        commits = self._index("commits", self._build_commits)
+        sha_prefix = sha_prefix.lower()
+        i = bisect.bisect_left(commits["shas"], sha_prefix)
+        if i < len(commits["shas"]) and commits["shas"][i].startswith(sha_prefix):
+            return commits["by_sha"][commits["shas"][i]]
+        return None
+
+    def commits_by(self, author):
+        return self._index("commits", self._build_commits)["by_author"].get(author.lower(), [])
+
+    def contributor(self, login):
+        return self._index("contributors", self._build_contributors).get(login.lower())
+
+    def search(self, text):
+        """Return (section, item) pairs matching every keyword of text"""
+        keywords = self._index("keywords", self._build_keywords)
+        refs = None
+        for token in tokenize(text):
+            matches = keywords.get(token, set())
+            refs = matches if refs is None else refs & matches
+            if not refs:
+                return []
+        return [(name, self.section(name)[pos]) for name, pos in sorted(refs or [])]
@@ -0,0 +1,137 @@
+# credential_pool.py
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from rate_scheduler import RateScheduler
+from ttl_cache import TTLCache
+
+_pinned = ContextVar("github_credential", default=None)
+
+
+class Credential:
+    """
+    One GitHub identity (personal token or App installation) with its own
+    PyGithub client, rate scheduler and cache of which repos it can reach.
+
+    auth is a token string or a PyGithub Auth object (App installations).
+    The PyGithub client is only built when a PyGithub call needs it, so
+    REST-only work never imports PyGithub; github_kwargs may be a callable
+    returning the client settings for the same reason.
+    """
+
+    def __init__(self, name, auth, github_kwargs=None, scheduler_kwargs=None, access_ttl=3600):
+        self.name = name
+        self.auth = auth
+        self.is_app = not isinstance(auth, str)
+        self.github_kwargs = github_kwargs or {}
+        self.scheduler = RateScheduler(**(scheduler_kwargs or {}))
+        self.access = TTLCache(ttl=access_ttl, max_entries=4096)
+        self._github = None
+        self._lock = threading.Lock()
+
+    @property
+    def github(self):
+        if self._github is None:
+            with self._lock:
+                if self._github is None:
+                    from github import Github, Auth
+                    auth = Auth.Token(self.auth) if isinstance(self.auth, str) else self.auth
+                    kwargs = self.github_kwargs() if callable(self.github_kwargs) else self.github_kwargs
+                    self._github = Github(auth=auth, **kwargs)
+        return self._github
+
+    @property
+    def token(self):
+        if isinstance(self.auth, str):
+            return self.auth
+        # App installation tokens are minted through the client's requester (bound when the
+        # client is built) and re-minted by PyGithub shortly before they expire
+        self.github
+        return self.auth.token
+
+    def authorization(self):
+        return f"token {self.token}"
+
+    def sync_budget(self):
+        """Copy the budget PyGithub last saw in response headers into the scheduler"""
+        requester = getattr(self._github, "requester", None)
+        if requester is None:
+            return
+        remaining, limit = requester.rate_limiting
+        if remaining >= 0:
+            self.scheduler.update(remaining, limit, requester.rate_limiting_resettime)
+
+
+class CredentialPool:
+    """
+    Routes each request to the credential with the most remaining budget
+    that can access the target repository.
+    """
+
+    def __init__(self, credentials):
+        if not credentials:
+            raise ValueError("No GitHub credentials configured (set GITHUB_TOKEN)")
+        self.credentials = credentials
+        self._lock = threading.Lock()
+
+    def primary(self):
+        """The first personal token: used for user-scoped calls such as listing your repos"""
+        for cred in self.credentials:
+            if not cred.is_app:
+                return cred
+        return self.credentials[0]
+
+    def select(self, repo_name=None, probe=None):
+        """
+        Pick a credential for repo_name.
+        probe(credential, repo_name) -> True / False is called for each credential/repo
+        whose access is still unknown; definite answers are cached per credential, while
+        None (the probe could not tell, e.g. a 5xx) is retried on the next selection.
+        """
+        pinned = _pinned.get()
+        if pinned is not None:
+            return pinned
+        if len(self.credentials) == 1 or repo_name is None:
+            return max(self.credentials, key=lambda c: c.scheduler.remaining)
+
+        key = repo_name.lower()
+        ranked = sorted(self.credentials, key=lambda c: c.scheduler.remaining, reverse=True)
+        for cred in ranked:
+            allowed = cred.access.get(key)
+            if allowed is None and probe is not None:
+                allowed = probe(cred, repo_name)
+                if allowed is not None:
+                    cred.access.set(key, allowed)
+            if allowed:
+                return cred
+        return ranked[0]
+
+    def stats(self):
+        per_credential = {cred.name: cred.scheduler.stats() for cred in self.credentials}
+        totals = {
+            "remaining": sum(s["remaining"] for s in per_credential.values()),
+            "limit": sum(s["limit"] for s in per_credential.values()),
+            "reset_in": min(s["reset_in"] for s in per_credential.values()),
+            "throttled": sum(s["throttled"] for s in per_credential.values()),
+            "waits": sum(s["waits"] for s in per_credential.values()),
+            "queue_depth": {},
+            "credentials": per_credential,
+        }
+        for s in per_credential.values():
+            for lane_name, depth in s["queue_depth"].items():
+                totals["queue_depth"][lane_name] = totals["queue_depth"].get(lane_name, 0) + depth
+        return totals
+
+
+@contextmanager
+def using(credential):
+    """Pin every GitHub call in the block to one credential"""
+    token = _pinned.set(credential)
+    try:
+        yield credential
+    finally:
+        _pinned.reset(token)
+
+
+def current_credential():
+    return _pinned.get()
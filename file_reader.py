@@ -0,0 +1,193 @@
+# file_reader.py
+import base64
+import codecs
+import os
+import posixpath
+import re
+from urllib.parse import quote
+from github_session import api_request, get_json, github_error, raise_for_status
+from object_store import get_store
+
+CHUNK_SIZE = 64 * 1024
+# Bytes fetched for a preview; enough for ~1000 characters of multi-byte text
+PREVIEW_BYTES = int(os.getenv("GITHUB_PREVIEW_BYTES", "4096"))
+RAW = "application/vnd.github.raw"
+# Blobs up to this size are downloaded whole and kept in the object store even for a preview
+STORE_ON_PREVIEW_BYTES = 1024 * 1024
+_FULL_SHA = re.compile(r"^[0-9a-f]{40}$")
+
+
+def _too_large(response):
+    # The contents API refuses big files with 403 / errors[].code == "too_large"
+    return response.status_code in (403, 413, 422) and "too_large" in response.text.replace(" ", "_").lower()
+
+
+def _blob_entry(repo_name, path, ref=None):
+    """Find a file's blob SHA and size from its parent directory listing"""
+    parent, name = posixpath.split(path.strip("/"))
+    listing = get_json(f"/repos/{repo_name}/contents/{quote(parent)}", {"ref": ref} if ref else None)
+    for entry in listing:
+        if entry["name"] == name and entry["type"] == "file":
+            return entry["sha"], entry["size"]
+    raise github_error(404, {"message": f"{path} not found"})
+
+
+def _range_headers(start, end):
+    headers = {"Accept": RAW}
+    if start or end is not None:
+        headers["Range"] = f"bytes={start}-{'' if end is None else end}"
+    return headers
+
+
+def _checked(response):
+    if response.status_code >= 400:
+        try:
+            raise_for_status(response)
+        finally:
+            response.close()
+    return response
+
+
+def _slice(response, start, max_bytes, chunk_size):
+    """Yield the requested slice of a streamed response, whether or not the server honoured the range"""
+    with response:
+        skip = 0 if response.status_code == 206 else start
+        remaining = max_bytes
+        for chunk in response.iter_content(chunk_size):
+            if skip:
+                if len(chunk) <= skip:
+                    skip -= len(chunk)
+                    continue
+                chunk, skip = chunk[skip:], 0
+            if remaining is not None:
+                chunk = chunk[:remaining]
+                remaining -= len(chunk)
+            if chunk:
+                yield chunk
+            if remaining == 0:
+                return
+
+
+def _store_blob(repo_name, sha, chunk_size):
+    """Download a whole blob into the object store; False if it could not be kept"""
+    store = get_store()
+    response = _checked(api_request("GET", f"/repos/{repo_name}/git/blobs/{sha}",
+                                    headers={"Accept": RAW}, stream=True))
+    try:
+        with response, store.writer("blob", sha) as f:
+            for chunk in response.iter_content(chunk_size):
+                f.write(chunk)
+    except OSError:
+        return False
+    return store.contains("blob", sha)
+
+
+def iter_blob(repo_name, sha, start=0, max_bytes=None, size=None, chunk_size=CHUNK_SIZE):
+    """
+    Yield a slice of a blob by SHA. Blobs never change, so they are served from the
+    on-disk object store; a missing blob is downloaded whole into it when small enough
+    (size, if known, decides that up front) and range-streamed otherwise.
+    """
+    if max_bytes == 0:
+        return
+    store = get_store()
+    whole = size is not None and size <= store.max_object_bytes and (
+        max_bytes is None or size <= max(max_bytes, STORE_ON_PREVIEW_BYTES))
+    for attempt in range(2):
+        with store.mapped("blob", sha) as mm:
+            if mm is not None:
+                end = len(mm) if max_bytes is None else min(len(mm), start + max_bytes)
+                for offset in range(start, end, chunk_size):
+                    yield bytes(mm[offset:min(offset + chunk_size, end)])
+                return
+        if attempt or not whole or not _store_blob(repo_name, sha, chunk_size):
+            break
+    end = start + max_bytes - 1 if max_bytes is not None else None
+    response = _checked(api_request("GET", f"/repos/{repo_name}/git/blobs/{sha}",
+                                    headers=_range_headers(start, end), stream=True))
+    yield from _slice(response, start, max_bytes, chunk_size)
+
+
+def _blob_at(repo_name, path, ref):
+    """
+    (sha, size) of path at a commit SHA: from the commit's tree index when it is
+    already loaded, otherwise from one contents request (which also fills the
+    object store for files small enough to be sent inline).
+    """
+    from tree_index import loaded_tree_index
+
+    index = loaded_tree_index(repo_name, ref)
+    if index is not None:
+        entry = index.get(path.strip("/"))
+        if entry is None or entry["type"] != "blob":
+            raise github_error(404, {"message": f"{path} not found"})
+        return entry["sha"], entry.get("size")
+    # Not kept in the conditional-request cache: the body holds the file itself
+    response = api_request("GET", f"/repos/{repo_name}/contents/{quote(path.strip('/'))}", params={"ref": ref})
+    raise_for_status(response)
+    meta = response.json()
+    if not isinstance(meta, dict) or meta.get("type") != "file":
+        raise github_error(404, {"message": f"{path} is not a file"})
+    if meta.get("encoding") == "base64":
+        # Files up to 1 MB come inline; store them instead of downloading the blob again
+        get_store().put("blob", meta["sha"], base64.b64decode(meta.get("content") or ""))
+    return meta["sha"], meta["size"]
+
+
+def iter_file(repo_name, path, ref=None, start=0, max_bytes=None, chunk_size=CHUNK_SIZE):
+    """
+    Yield a file's bytes in chunks, from offset start and at most max_bytes in total.
+    At a full commit SHA the file is immutable and read by blob SHA through the object store.
+    Otherwise asks the contents API for a byte range (the blob API when the file is too
+    large for it); if the server sends the whole file instead, the skipped and excess
+    bytes are discarded and the connection is closed as soon as enough was read.
+    """
+    if max_bytes == 0:
+        return
+    if ref and _FULL_SHA.match(ref):
+        sha, size = _blob_at(repo_name, path, ref)
+        yield from iter_blob(repo_name, sha, start, max_bytes, size, chunk_size)
+        return
+    end = start + max_bytes - 1 if max_bytes is not None else None
+    response = api_request("GET", f"/repos/{repo_name}/contents/{quote(path.strip('/'))}",
+                           params={"ref": ref} if ref else None, headers=_range_headers(start, end), stream=True)
+    if _too_large(response):
+        response.close()
+        sha, size = _blob_entry(repo_name, path, ref)
+        yield from iter_blob(repo_name, sha, start, max_bytes, size, chunk_size)
+        return
+    yield from _slice(_checked(response), start, max_bytes, chunk_size)
+
+
+def read_file(repo_name, path, ref=None, start=0, max_bytes=None):
+    """Return a file's bytes (or the requested slice of them)"""
+    return b"".join(iter_file(repo_name, path, ref, start, max_bytes))
+
+
+def read_text(repo_name, path, ref=None, max_bytes=None):
+    """
+    Return a file's text, reading at most max_bytes.
+    A multi-byte character cut by the limit is dropped rather than garbled.
+    """
+    data = read_file(repo_name, path, ref, max_bytes=max_bytes)
+    truncated = max_bytes is not None and len(data) >= max_bytes
+    return codecs.getincrementaldecoder("utf-8")(errors="replace").decode(data, final=not truncated)
+
+
+def download_file(repo_name, path, dest, ref=None, chunk_size=CHUNK_SIZE):
+    """
+    Stream a file to dest with constant memory; the file only appears once complete.
+    Returns the number of bytes written.
+    """
+    tmp = f"{dest}.part"
+    written = 0
+    try:
+        with open(tmp, "wb") as f:
+            for chunk in iter_file(repo_name, path, ref, chunk_size=chunk_size):
+                f.write(chunk)
+                written += len(chunk)
+        os.replace(tmp, dest)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+    return written
@@ -1,119 +1,165 @@
 # github_client.py
+import hashlib
+import json
 import os
-import base64
-import requests
-from github import Github, GithubException
-from dotenv import load_dotenv
+import threading
+import time
+import contextvars
+from concurrent.futures import Future
+from github_session import get_token, get_github, get_repo, scheduled, note_github_error, seed_repo, forget_repo, api_request, get_json, paginate, error_message, TRANSPORT
+from graphql_client import fetch_repo_summary
+from file_reader import read_text
+from repo_counts import get_repo_counts
 
-load_dotenv()
-
-BASE_URL = "https://api.github.com"
-# Load the token
-token = os.getenv("GITHUB_TOKEN")
-if not token:
-    raise ValueError("GITHUB_TOKEN not found in .env")
-
-# GitHub client
-g = Github(token)
+# Last repo listing, kept on disk so the CLI and app can start without waiting for GitHub
+CACHE_DIR = os.getenv("MCP_CACHE_DIR", ".mcp_cache")
+REPO_LIST_PATH = os.path.join(CACHE_DIR, "repos.json")
+REPO_LIST_TTL = int(os.getenv("GITHUB_REPO_LIST_TTL", "3600"))
 
+@scheduled("interactive")
 def list_user_repos():
     """List your GitHub repositories"""
-    user = g.get_user()
-    return [repo.full_name for repo in user.get_repos()]
+    user = get_github().get_user()
+    names = []
+    for repo in user.get_repos():
+        seed_repo(repo)  # listing payloads are full repo objects; reuse them as handles
+        names.append(repo.full_name)
+    _save_repo_list(names)
+    return names
+
+def _token_id():
+    # Lists are stored per token so switching accounts never shows someone else's repos
+    return hashlib.sha256((get_token() or "").encode()).hexdigest()[:16]
+
+def _save_repo_list(names):
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        tmp = f"{REPO_LIST_PATH}.{os.getpid()}.tmp"
+        with open(tmp, "w") as f:
+            json.dump({"token": _token_id(), "saved_at": time.time(), "repos": names}, f)
+        os.replace(tmp, REPO_LIST_PATH)
+    except OSError:
+        pass  # the cache is an optimisation only
+
+def cached_user_repos(max_age=REPO_LIST_TTL):
+    """Repo names from the last listing saved on disk, or None if missing, stale or for another token"""
+    try:
+        with open(REPO_LIST_PATH, "r") as f:
+            saved = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if saved.get("token") != _token_id() or time.time() - saved.get("saved_at", 0) > max_age:
+        return None
+    return saved.get("repos")
+
+def prefetch_user_repos():
+    """
+    Start list_user_repos on a background thread and return a Future,
+    so startup can show a prompt (or the cached list) while GitHub answers.
+    """
+    future = Future()
+
+    def run():
+        try:
+            future.set_result(list_user_repos())
+        except Exception as e:
+            future.set_exception(e)
+
+    threading.Thread(target=contextvars.copy_context().run, args=(run,), daemon=True).start()
+    return future
 
 def get_repo_stats(repo_name):
     """Get basic stats for a repo"""
-    repo = g.get_repo(repo_name)
+    repo = get_json(f"/repos/{repo_name}")
     return {
-        "name": repo.full_name,
-        "description": repo.description,
-        "stars": repo.stargazers_count,
-        "forks": repo.forks_count,
-        "open_issues": repo.open_issues_count,
+        "name": repo["full_name"],
+        "description": repo["description"],
+        "stars": repo["stargazers_count"],
+        "forks": repo["forks_count"],
+        "open_issues": repo["open_issues_count"],
     }
 
 # print("GitHub client initialized.")
 def list_pull_requests(repo_name):
     """List open pull requests in a repo"""
-    repo = g.get_repo(repo_name)
-    return [(pr.number, pr.title) for pr in repo.get_pulls(state='open')]
+    pulls = paginate(f"/repos/{repo_name}/pulls", {"state": "open"})
+    return [(pr["number"], pr["title"]) for pr in pulls]
 
-def get_file_content(repo_full_name, path, branch=None):
+def get_file_content(repo_full_name, path, branch=None, max_bytes=None):
+    """
+    Return a file's text. The raw bytes are streamed (blob API for files too large
+    for the contents API) and reading stops after max_bytes, so previews only
+    transfer what they show.
+    """
     try:
-        repo = g.get_repo(repo_full_name)
-        if branch:
-            file_content = repo.get_contents(path, ref=branch)
-        else:
-            file_content = repo.get_contents(path)
-        return base64.b64decode(file_content.content).decode()
+        return read_text(repo_full_name, path, ref=branch, max_bytes=max_bytes)
     except Exception as e:
         return f"❌ Error fetching file content: {e}"
 
 def get_repo_topics(repo_full_name):
     try:
-        repo = g.get_repo(repo_full_name)
-        return repo.get_topics()
-    except GithubException as e:
-        return f"❌ Error fetching topics: {e.data.get('message', str(e))}"
+        return get_json(f"/repos/{repo_full_name}/topics")["names"]
+    except Exception as e:
+        return f"❌ Error fetching topics: {error_message(e)}"
 
+@scheduled("write")
 def add_repo_topics(repo_full_name, new_topics):
     try:
-        repo = g.get_repo(repo_full_name)
+        repo = get_repo(repo_full_name)
         existing_topics = repo.get_topics()
         all_topics = list(set(existing_topics + new_topics))
         repo.replace_topics(all_topics)
         return f"✅ Topics updated: {', '.join(all_topics)}"
-    except GithubException as e:
-        return f"❌ Error adding topics: {e.data.get('message', str(e))}"
+    except Exception as e:
+        note_github_error(e)
+        return f"❌ Error adding topics: {error_message(e)}"
 
 def get_repo_license(repo_full_name):
     try:
-        repo = g.get_repo(repo_full_name)
-        return repo.get_license().license.name
-    except GithubException as e:
-        return f"❌ Error fetching license: {e.data.get('message', str(e))}"
+        return get_json(f"/repos/{repo_full_name}/license")["license"]["name"]
+    except Exception as e:
+        return f"❌ Error fetching license: {error_message(e)}"
 
 def update_repo_description(repo_full_name, new_description):
-    url = f"{BASE_URL}/repos/{repo_full_name}"
-    headers = {
-        "Authorization": f"token {token}",
-        "Accept": "application/vnd.github+json"
-    }
-    response = requests.patch(
-        url,
-        headers=headers,
+    response = api_request(
+        "PATCH",
+        f"/repos/{repo_full_name}",
         json={"description": new_description}
     )
 
     if response.status_code == 200:
+        forget_repo(repo_full_name)
         return f"✅ Description updated to: {new_description}"
     else:
         return f"❌ Failed to update description: {response.json().get('message', 'Unknown error')}"
 
-def get_repo_summary(repo_name):
+@scheduled("interactive")
+def get_repo_summary(repo_name, transport=None):
     """
     Generate a summary of the repository including stats, topics, and recent activity.
+    transport="graphql" (or GITHUB_TRANSPORT=graphql) gathers everything in one query.
     """
     try:
-        repo = g.get_repo(repo_name)
-        stats = get_repo_stats(repo_name)
+        if (transport or TRANSPORT) == "graphql":
+            return fetch_repo_summary(repo_name)
+
+        repo = get_repo(repo_name)
         topics = repo.get_topics()
-        open_issues = len([i for i in repo.get_issues(state="open") if i.pull_request is None])
-        open_prs = len(list(repo.get_pulls(state="open")))
-        recent_commits = len(list(repo.get_commits()[:5]))
+        counts = get_repo_counts(repo_name)
         
         summary = {
-            "name": stats.get("name", repo_name),
-            "description": stats.get("description", "No description available"),
-            "stars": stats.get("stars", 0),
-            "forks": stats.get("forks", 0),
-            "open_issues": open_issues,
-            "open_prs": open_prs,
-            "recent_commits": recent_commits,
+            "name": repo.full_name,
+            "description": repo.description or "No description available",
+            "stars": repo.stargazers_count,
+            "forks": repo.forks_count,
+            "open_issues": counts["open_issues"],
+            "open_prs": counts["open_prs"],
+            "recent_commits": counts["recent_commits"],
             "topics": topics if topics else ["None"],
             "created_at": repo.created_at.strftime('%Y-%m-%d'),
             "last_updated": repo.updated_at.strftime('%Y-%m-%d')
         }
         return summary
     except Exception as e:
+        note_github_error(e)
         return f"[ERROR] Failed to generate repo summary: {str(e)}"
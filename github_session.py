@@ -0,0 +1,494 @@
+# github_session.py
+import os
+import re
+import threading
+import functools
+from contextvars import ContextVar
+from datetime import datetime
+import requests
+from requests.structures import CaseInsensitiveDict
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from dotenv import load_dotenv
+from http_cache import ConditionalCache
+from ttl_cache import TTLCache
+from rate_scheduler import is_rate_limited, lane, read_lane
+from credential_pool import Credential, CredentialPool, using, current_credential
+from circuit_breaker import get_breaker
+from object_store import get_store
+
+load_dotenv()
+
+BASE_URL = "https://api.github.com"
+
+# Connection settings, overridable from .env
+POOL_SIZE = int(os.getenv("GITHUB_POOL_SIZE", "20"))
+CONNECT_TIMEOUT = float(os.getenv("GITHUB_CONNECT_TIMEOUT", "5"))
+READ_TIMEOUT = float(os.getenv("GITHUB_READ_TIMEOUT", "30"))
+MAX_RETRIES = int(os.getenv("GITHUB_MAX_RETRIES", "3"))
+CACHE_SIZE = int(os.getenv("GITHUB_CACHE_SIZE", "512"))
+REPO_HANDLE_TTL = int(os.getenv("GITHUB_REPO_HANDLE_TTL", "300"))
+# "rest" or "graphql" for multi-section reads (summary, MCP context)
+TRANSPORT = os.getenv("GITHUB_TRANSPORT", "rest").lower()
+# Share of the hourly budget background exports leave for interactive use
+BACKGROUND_RESERVE = float(os.getenv("GITHUB_BACKGROUND_RESERVE", "0.1"))
+WRITE_INTERVAL = float(os.getenv("GITHUB_WRITE_INTERVAL", "1.0"))
+RATE_LIMIT_RETRIES = int(os.getenv("GITHUB_RATE_LIMIT_RETRIES", "3"))
+
+# Extra credentials: comma-separated personal tokens and GitHub App installations
+EXTRA_TOKENS = [t.strip() for t in os.getenv("GITHUB_TOKENS", "").split(",") if t.strip()]
+APP_ID = os.getenv("GITHUB_APP_ID")
+APP_PRIVATE_KEY_PATH = os.getenv("GITHUB_APP_PRIVATE_KEY_PATH")
+APP_INSTALLATION_IDS = [i.strip() for i in os.getenv("GITHUB_APP_INSTALLATION_IDS", "").split(",") if i.strip()]
+
+# Consecutive outages (connection errors, timeouts, 5xx) before calls short-circuit
+BREAKER_THRESHOLD = int(os.getenv("GITHUB_BREAKER_THRESHOLD", "5"))
+BREAKER_RESET = float(os.getenv("GITHUB_BREAKER_RESET", "30"))
+
+_lock = threading.Lock()
+_pool = None
+_session = None
+_cache = ConditionalCache(CACHE_SIZE)
+_repo_handles = TTLCache(ttl=REPO_HANDLE_TTL, max_entries=1024)
+_REPO_PATH = re.compile(r"^/repos/([^/]+/[^/?]+)")
+_breaker = get_breaker("github", BREAKER_THRESHOLD, BREAKER_RESET)
+# True while a @scheduled call has rate-limit retries left
+_rate_limit_retry = ContextVar("github_rate_limit_retry", default=False)
+# Inside a @scheduled call: whether the breaker admitted it (None outside such calls),
+# and the errors its function handled itself
+_admission = ContextVar("github_breaker_admission", default=None)
+_call_errors = ContextVar("github_call_errors", default=None)
+
+
+def get_token():
+    """Return the GitHub token from the environment"""
+    return os.getenv("GITHUB_TOKEN")
+
+
+def github_error(status, data, headers=None):
+    """
+    Build a PyGithub GithubException, importing PyGithub only when an error
+    actually has to be raised.
+    """
+    from github import GithubException
+    return GithubException(status, data, headers or {})
+
+
+def error_message(exc):
+    """The API's message for a GithubException, or the exception text"""
+    data = getattr(exc, "data", None)
+    if isinstance(data, dict) and data.get("message"):
+        return data["message"]
+    return str(exc)
+
+
+def _is_outage(exc):
+    """Errors that say GitHub itself is unreachable or failing, as opposed to a bad request"""
+    status = getattr(exc, "status", None)
+    if isinstance(status, int):
+        return status >= 500
+    return isinstance(exc, requests.RequestException)
+
+
+def _allowed():
+    """Breaker check for one GitHub call; inside a @scheduled call the call's admission decides"""
+    admitted = _admission.get()
+    return _breaker.allow() if admitted is None else admitted
+
+
+def _circuit_open():
+    message = f"GitHub is unavailable (circuit open, next probe in {_breaker.retry_in()}s)"
+    return github_error(503, {"message": message})
+
+
+def _retry_policy():
+    return Retry(
+        total=MAX_RETRIES,
+        backoff_factor=0.5,
+        status_forcelist=(500, 502, 503, 504),
+        respect_retry_after_header=True,
+    )
+
+
+def _github_kwargs():
+    """PyGithub client settings, built with the first client so PyGithub is imported only then"""
+    from github import GithubRetry
+    return {
+        "pool_size": POOL_SIZE,
+        # PyGithub takes a single integer timeout; the REST session uses (connect, read)
+        "timeout": int(READ_TIMEOUT),
+        # GithubRetry also waits out 403 secondary rate limits, unlike a plain 5xx Retry
+        "retry": GithubRetry(total=MAX_RETRIES),
+    }
+
+
+def _build_credentials():
+    github_kwargs = _github_kwargs
+    scheduler_kwargs = {"background_reserve": BACKGROUND_RESERVE, "write_interval": WRITE_INTERVAL}
+    credentials = []
+    tokens = [get_token()] + EXTRA_TOKENS if get_token() else EXTRA_TOKENS
+    for i, token in enumerate(dict.fromkeys(tokens), 1):
+        credentials.append(Credential(f"token-{i}", token, github_kwargs, scheduler_kwargs))
+    if APP_ID and APP_PRIVATE_KEY_PATH:
+        from github import Auth
+        with open(APP_PRIVATE_KEY_PATH, "r") as f:
+            app_auth = Auth.AppAuth(int(APP_ID), f.read())
+        for installation_id in APP_INSTALLATION_IDS:
+            auth = app_auth.get_installation_auth(int(installation_id))
+            credentials.append(Credential(f"app-{installation_id}", auth, github_kwargs, scheduler_kwargs))
+    return credentials
+
+
+def get_pool():
+    """Return the credential pool, built once from .env"""
+    global _pool
+    if _pool is None:
+        with _lock:
+            if _pool is None:
+                _pool = CredentialPool(_build_credentials())
+    return _pool
+
+
+def _probe_access(cred, repo_name):
+    """
+    Check whether cred can read repo_name (one request, cached by the pool).
+    None when the answer says nothing about access (5xx, rate limited, ...).
+    """
+    with using(cred):
+        response = api_request("GET", f"/repos/{repo_name}")
+    if response.status_code in (200, 404):
+        return response.status_code == 200
+    return None
+
+
+def select_credential(repo_name=None):
+    return get_pool().select(repo_name, probe=_probe_access)
+
+
+def get_github(repo_name=None):
+    """
+    Return a shared PyGithub client.
+    Each credential's client is built once with a thread-safe keep-alive pool, so every
+    module reuses warm connections; repo_name routes to the credential with the most budget.
+    """
+    if _admission.get() is False:
+        raise _circuit_open()
+    if repo_name is None:
+        return current_credential().github if current_credential() else get_pool().primary().github
+    return select_credential(repo_name).github
+
+
+def get_session():
+    """
+    Return the shared requests session for direct REST calls.
+    requests.Session is safe to share across threads once its adapters are mounted;
+    the Authorization header is set per request by the chosen credential.
+    """
+    global _session
+    if _session is None:
+        with _lock:
+            if _session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(
+                    pool_connections=POOL_SIZE,
+                    pool_maxsize=POOL_SIZE,
+                    max_retries=_retry_policy(),
+                )
+                session.mount("https://", adapter)
+                session.headers.update({
+                    "Accept": "application/vnd.github+json",
+                    "X-GitHub-Api-Version": "2022-11-28",
+                })
+                _session = session
+    return _session
+
+
+def get_repo(repo_name):
+    """
+    Return a PyGithub Repository handle, memoized by credential and full name.
+    Saves the GET /repos/{name} round trip most operations start with.
+    """
+    cred = select_credential(repo_name)
+    if not _allowed():
+        raise _circuit_open()
+    key = f"{cred.name}:{repo_name.lower()}"
+    # While half-open the handle is fetched for real so the probe reaches GitHub
+    repo = _repo_handles.get(key) if _breaker.state == "closed" else None
+    if repo is None:
+        cred.scheduler.acquire(read_lane())
+        try:
+            repo = cred.github.get_repo(repo_name)
+        except Exception as e:
+            if _is_outage(e):
+                _breaker.record_failure()
+            else:
+                _breaker.record_success()
+            raise
+        finally:
+            cred.sync_budget()
+        _breaker.record_success()
+        _repo_handles.set(key, repo)
+    return repo
+
+
+def seed_repo(repo, cred=None):
+    """Store a Repository object already fetched elsewhere (e.g. from a listing)"""
+    cred = cred or current_credential() or get_pool().primary()
+    cred.access.set(repo.full_name.lower(), True)
+    _repo_handles.set(f"{cred.name}:{repo.full_name.lower()}", repo)
+
+
+def forget_repo(repo_name):
+    """Drop memoized handles after the repository itself was modified"""
+    for cred in get_pool().credentials:
+        _repo_handles.invalidate(f"{cred.name}:{repo_name.lower()}")
+
+
+def _rate_limit_headers(exc):
+    """The response headers of a rate-limit GithubException, or None for any other error"""
+    status = getattr(exc, "status", None)
+    # PyGithub lower-cases header names
+    headers = CaseInsensitiveDict(getattr(exc, "headers", None) or {})
+    return headers if is_rate_limited(headers, status) else None
+
+
+def note_github_error(exc):
+    """
+    Call first in the except clause of a @scheduled function so the decorator sees
+    errors the function would otherwise turn into a message: a rate-limit error is
+    re-raised so the decorator can wait for the reset and retry, unless no retries
+    are left (then the function reports it like any other error), and outages are
+    reported to the "github" circuit breaker.
+    """
+    errors = _call_errors.get()
+    if errors is not None:
+        errors.append(exc)
+    if _rate_limit_retry.get() and _rate_limit_headers(exc) is not None:
+        raise exc
+
+
+def _record_call(errors):
+    """Report a finished @scheduled call to the breaker from the errors it ran into"""
+    if any(_is_outage(e) for e in errors):
+        _breaker.record_failure()
+    elif not errors or any(isinstance(getattr(e, "status", None), int) for e in errors):
+        _breaker.record_success()  # GitHub answered, even if with an error
+    else:
+        _breaker.release()
+
+
+def scheduled(lane_name):
+    """
+    Decorator for functions that talk to GitHub through PyGithub objects.
+    Picks a credential from the repo_name argument (if any) and pins it for the call,
+    runs in lane_name, waits for a scheduler slot first and syncs the budget after.
+    A rate-limit rejection pauses the credential's scheduler until the reset and the
+    call is retried, up to GITHUB_RATE_LIMIT_RETRIES times.
+    The whole call is one admission of the "github" circuit breaker: while it is open,
+    every GitHub access in the call fails at once, and the call's outcome (including
+    errors noted with note_github_error) is recorded.
+    """
+    def decorator(fn):
+        def run(args, kwargs, lane_name):
+            repo_name = args[0] if args and isinstance(args[0], str) else None
+            # A short-circuited call makes no requests, so no access probe either
+            routed = repo_name and _admission.get() is not False
+            cred = select_credential(repo_name) if routed else (current_credential() or get_pool().primary())
+            with lane(lane_name), using(cred):
+                for attempt in range(RATE_LIMIT_RETRIES + 1):
+                    cred.scheduler.acquire(lane_name)
+                    retry = _rate_limit_retry.set(attempt < RATE_LIMIT_RETRIES)
+                    try:
+                        return fn(*args, **kwargs)
+                    except Exception as e:
+                        headers = _rate_limit_headers(e)
+                        if headers is None or attempt == RATE_LIMIT_RETRIES:
+                            raise
+                        cred.scheduler.observe(headers, e.status)
+                    finally:
+                        _rate_limit_retry.reset(retry)
+                        cred.sync_budget()
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if _admission.get() is not None:
+                # Nested in another @scheduled call, which holds the admission
+                return run(args, kwargs, lane_name)
+            admitted = _breaker.allow()
+            admission = _admission.set(admitted)
+            errors = []
+            noted = _call_errors.set(errors)
+            try:
+                return run(args, kwargs, lane_name)
+            except Exception as e:
+                errors.append(e)
+                raise
+            finally:
+                _call_errors.reset(noted)
+                _admission.reset(admission)
+                if admitted:
+                    _record_call(errors)
+        return wrapper
+    return decorator
+
+
+def api_request(method, path, lane_name=None, **kwargs):
+    """
+    Send a request to the GitHub REST API over the shared session.
+    The credential is chosen from the repository in the path; every call is admitted
+    by that credential's rate scheduler. Reads use the caller's lane, mutations the
+    write lane. Rate-limit rejections wait and retry. Outages feed the "github" circuit
+    breaker; while it is open the call raises a 503 GithubException without a request.
+    """
+    url = path if path.startswith("http") else f"{BASE_URL}{path}"
+    if lane_name is None:
+        is_read = method == "GET" or url == f"{BASE_URL}/graphql"
+        lane_name = read_lane() if is_read else "write"
+    match = _REPO_PATH.match(url[len(BASE_URL):]) if url.startswith(BASE_URL) else None
+    cred = select_credential(match.group(1) if match else None)
+    if not _allowed():
+        raise _circuit_open()
+
+    kwargs.setdefault("timeout", (CONNECT_TIMEOUT, READ_TIMEOUT))
+    headers = dict(kwargs.pop("headers", None) or {})
+    try:
+        for _ in range(RATE_LIMIT_RETRIES + 1):
+            cred.scheduler.acquire(lane_name)
+            headers["Authorization"] = cred.authorization()
+            response = get_session().request(method, url, headers=headers, **kwargs)
+            if not cred.scheduler.observe(response.headers, response.status_code):
+                break
+    except requests.RequestException:
+        _breaker.record_failure()
+        raise
+    except BaseException:
+        _breaker.release()
+        raise
+    if response.status_code >= 500:
+        _breaker.record_failure()
+    else:
+        _breaker.record_success()
+    return response
+
+
+def raise_for_status(response):
+    """Surface API errors as GithubException so callers handle them like PyGithub errors"""
+    if response.status_code >= 400:
+        try:
+            data = response.json()
+        except ValueError:
+            data = {"message": response.text}
+        raise github_error(response.status_code, data, dict(response.headers))
+
+
+def _cached_get(path, params=None):
+    url = path if path.startswith("http") else f"{BASE_URL}{path}"
+    key = requests.Request("GET", url, params=params).prepare().url
+    entry = _cache.get(key)
+    headers = {}
+    if entry:
+        if entry["etag"]:
+            headers["If-None-Match"] = entry["etag"]
+        if entry["last_modified"]:
+            headers["If-Modified-Since"] = entry["last_modified"]
+
+    if entry and _breaker.retry_in() > 0:
+        # GitHub is down: serve the last copy instead of failing
+        _cache.record_hit()
+        return entry["body"], entry["links"]
+    try:
+        response = api_request("GET", key, headers=headers)
+    except Exception as e:
+        if entry and _is_outage(e):
+            _cache.record_hit()
+            return entry["body"], entry["links"]
+        raise
+    if response.status_code >= 500 and entry:
+        _cache.record_hit()
+        return entry["body"], entry["links"]
+    if response.status_code == 304 and entry:
+        _cache.record_hit()
+        return entry["body"], entry["links"]
+
+    raise_for_status(response)
+    _cache.record_miss()
+    body = response.json()
+    etag = response.headers.get("ETag")
+    last_modified = response.headers.get("Last-Modified")
+    if etag or last_modified:
+        _cache.put(key, etag=etag, last_modified=last_modified, body=body, links=response.links)
+    return body, response.links
+
+
+def get_page(path, params=None):
+    """GET one page of a REST listing, returning (body, links) parsed from the Link header"""
+    return _cached_get(path, params)
+
+
+def get_json(path, params=None):
+    """GET a REST resource, revalidating any cached copy with If-None-Match / If-Modified-Since"""
+    body, _ = _cached_get(path, params)
+    return body
+
+
+def get_immutable(kind, sha, path, params=None):
+    """
+    GET a resource addressed by a git SHA (commit, tree, ...). The body can never
+    change, so it is read from the on-disk object store when present and stored
+    after the first download.
+    """
+    store = get_store()
+    body = store.get_json(kind, sha)
+    if body is None:
+        response = api_request("GET", path, params=params)
+        raise_for_status(response)
+        store.put(kind, sha, response.content)
+        body = response.json()
+    return body
+
+
+def paginate(path, params=None, limit=None):
+    """GET every page of a REST listing (each page cached conditionally)"""
+    params = dict(params or {})
+    params.setdefault("per_page", 100)
+    items = []
+    url = path
+    while url:
+        body, links = _cached_get(url, params)
+        items.extend(body)
+        if limit and len(items) >= limit:
+            return items[:limit]
+        url = links.get("next", {}).get("url")
+        params = None  # the next link already carries the query string
+    return items
+
+
+def graphql(query, variables=None):
+    """Run a GraphQL query and return its data, raising GithubException on errors"""
+    response = api_request("POST", "/graphql", json={"query": query, "variables": variables or {}})
+    raise_for_status(response)
+    payload = response.json()
+    if payload.get("errors"):
+        message = "; ".join(err.get("message", str(err)) for err in payload["errors"])
+        raise github_error(response.status_code, {"message": message, "errors": payload["errors"]}, dict(response.headers))
+    return payload["data"]
+
+
+def scheduler_stats():
+    """Return remaining budget, queue depth per lane and wait counters, summed over credentials"""
+    return get_pool().stats()
+
+
+def breaker_state():
+    """State and counters of the GitHub circuit breaker"""
+    return _breaker.stats()
+
+
+def cache_stats():
+    """Return hit/miss counters of the conditional-request cache"""
+    return _cache.stats()
+
+
+def parse_timestamp(value):
+    """Parse an ISO-8601 timestamp from the REST API"""
+    return datetime.strptime(value, "%Y-%m-%dT%H:%M:%SZ") if value else None
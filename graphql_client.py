@@ -0,0 +1,178 @@
+# graphql_client.py
+from github_session import graphql, get_json, parse_timestamp
+
+# Fields shared by the summary and the MCP context
+REPO_FIELDS = """
+    nameWithOwner
+    description
+    url
+    stargazerCount
+    forkCount
+    createdAt
+    updatedAt
+    repositoryTopics(first: 20) { nodes { topic { name } } }
+"""
+
+SUMMARY_QUERY = """
+query($owner: String!, $name: String!) {
+  repository(owner: $owner, name: $name) {
+    %s
+    issues(states: OPEN) { totalCount }
+    pullRequests(states: OPEN) { totalCount }
+    defaultBranchRef { target { ... on Commit { history(first: 5) { nodes { oid } } } } }
+  }
+}
+""" % REPO_FIELDS
+
+CONTEXT_QUERY = """
+query($owner: String!, $name: String!) {
+  repository(owner: $owner, name: $name) {
+    %s
+    defaultBranchRef {
+      target {
+        ... on Commit {
+          history(first: 5) {
+            nodes { oid messageHeadline authoredDate author { name } }
+          }
+        }
+      }
+    }
+    openIssues: issues(states: OPEN, first: 5, orderBy: {field: CREATED_AT, direction: DESC}) {
+      nodes { number title createdAt author { login } }
+    }
+    closedIssues: issues(states: CLOSED, first: 5, orderBy: {field: CREATED_AT, direction: DESC}) {
+      nodes { number title createdAt closedAt author { login } }
+    }
+    recentIssues: issues(first: 10, orderBy: {field: CREATED_AT, direction: DESC}) {
+      nodes {
+        number
+        comments(first: 3) { nodes { body createdAt author { login } } }
+      }
+    }
+    pullRequests(states: OPEN, first: 5, orderBy: {field: CREATED_AT, direction: DESC}) {
+      nodes { number title createdAt author { login } }
+    }
+  }
+}
+""" % REPO_FIELDS
+
+
+def _query_repo(query, repo_name):
+    owner, name = repo_name.split("/", 1)
+    return graphql(query, {"owner": owner, "name": name})["repository"]
+
+
+def _date(value, fmt="%Y-%m-%d"):
+    return parse_timestamp(value).strftime(fmt) if value else "N/A"
+
+
+def _login(node):
+    return node["author"]["login"] if node.get("author") else "Unknown"
+
+
+def _topics(repo):
+    return [n["topic"]["name"] for n in repo["repositoryTopics"]["nodes"]]
+
+
+def _history(repo):
+    target = (repo.get("defaultBranchRef") or {}).get("target") or {}
+    return target.get("history", {}).get("nodes", [])
+
+
+def fetch_repo_summary(repo_name):
+    """Same dict as github_client.get_repo_summary, gathered in a single GraphQL query"""
+    repo = _query_repo(SUMMARY_QUERY, repo_name)
+    topics = _topics(repo)
+    return {
+        "name": repo["nameWithOwner"],
+        "description": repo["description"] or "No description available",
+        "stars": repo["stargazerCount"],
+        "forks": repo["forkCount"],
+        "open_issues": repo["issues"]["totalCount"],
+        "open_prs": repo["pullRequests"]["totalCount"],
+        "recent_commits": len(_history(repo)),
+        "topics": topics if topics else ["None"],
+        "created_at": _date(repo["createdAt"]),
+        "last_updated": _date(repo["updatedAt"]),
+    }
+
+
+def fetch_mcp_context(repo_name):
+    """
+    Same dict as mcp_exporter.generate_mcp_context, in two round trips:
+    one GraphQL query for every section, plus REST for contributors (not exposed by GraphQL).
+    """
+    repo = _query_repo(CONTEXT_QUERY, repo_name)
+
+    try:
+        contributors_list = [
+            {
+                "login": c["login"],
+                "html_url": c["html_url"],
+                "contributions": c["contributions"]
+            } for c in get_json(f"/repos/{repo_name}/contributors", {"per_page": 5})
+        ]
+    except Exception:
+        contributors_list = []
+
+    issue_comments_list = [
+        {
+            "issue_number": issue["number"],
+            "comment_body": c["body"][:200],
+            "commenter": _login(c),
+            "created_at": _date(c["createdAt"])
+        }
+        for issue in repo["recentIssues"]["nodes"]
+        for c in issue["comments"]["nodes"]
+    ]
+
+    return {
+        "@context": "https://modelcontextprotocol.io/context/v1",
+        "modelcontext": {
+            "repository": {
+                "name": repo["nameWithOwner"],
+                "description": repo["description"],
+                "url": repo["url"],
+                "stars": repo["stargazerCount"],
+                "forks": repo["forkCount"],
+                "topics": _topics(repo),
+                "created_at": _date(repo["createdAt"]),
+                "updated_at": _date(repo["updatedAt"]),
+            },
+            "contributors": contributors_list,
+            "recent_commits": [
+                {
+                    "sha": c["oid"],
+                    "author": c["author"]["name"] if c.get("author") else "Unknown",
+                    "message": c["messageHeadline"],
+                    "date": _date(c["authoredDate"])
+                } for c in _history(repo)
+            ],
+            "open_issues": [
+                {
+                    "number": i["number"],
+                    "title": i["title"],
+                    "created_at": _date(i["createdAt"]),
+                    "user": _login(i)
+                } for i in repo["openIssues"]["nodes"]
+            ],
+            "closed_issues": [
+                {
+                    "number": i["number"],
+                    "title": i["title"],
+                    "created_at": _date(i["createdAt"]),
+                    "closed_at": _date(i["closedAt"]),
+                    "user": _login(i)
+                } for i in repo["closedIssues"]["nodes"]
+            ],
+            "issue_comments": issue_comments_list,
+            "open_pull_requests": [
+                {
+                    "number": pr["number"],
+                    "title": pr["title"],
+                    "created_at": _date(pr["createdAt"]),
+                    "user": _login(pr)
+                } for pr in repo["pullRequests"]["nodes"]
+            ]
+        }
+    }
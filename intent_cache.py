@@ -0,0 +1,124 @@
+# intent_cache.py
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+CACHE_DIR = os.getenv("MCP_CACHE_DIR", ".mcp_cache")
+INTENT_TTL = int(os.getenv("INTENT_CACHE_TTL", "86400"))
+INTENT_MEMORY_SIZE = int(os.getenv("INTENT_CACHE_MEMORY_SIZE", "256"))
+
+
+_QUOTED = re.compile(r"""(['"][^'"]*['"])""")
+
+
+def normalize_command(command):
+    """
+    Surrounding whitespace, repeated spaces and trailing punctuation don't change
+    the intent; quoted text (titles, comments) is kept verbatim. Case is kept too:
+    unquoted branch names and file paths are case-sensitive.
+    """
+    parts = _QUOTED.split(command.strip())
+    command = "".join(p if i % 2 else re.sub(r"\s+", " ", p) for i, p in enumerate(parts))
+    return command.rstrip(".!? ")
+
+
+class IntentCache:
+    """
+    Parsed intents keyed by (normalized command, repo).
+    An in-memory LRU sits in front of a SQLite table that survives restarts
+    and can be shared by several processes; both tiers honour the TTL.
+    """
+
+    def __init__(self, path=None, ttl=INTENT_TTL, memory_size=INTENT_MEMORY_SIZE):
+        self.path = path or os.path.join(CACHE_DIR, "intents.sqlite3")
+        self.ttl = ttl
+        self.memory_size = memory_size
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def _connection(self):
+        if self._db is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._db = sqlite3.connect(self.path, timeout=5, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS intents (key TEXT PRIMARY KEY, value TEXT NOT NULL, expires REAL NOT NULL)"
+            )
+        return self._db
+
+    @staticmethod
+    def _key(command, repo_name):
+        return f"{(repo_name or '').lower()}\n{normalize_command(command)}"
+
+    def _remember(self, key, value, expires):
+        self._memory[key] = (value, expires)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_size:
+            self._memory.popitem(last=False)
+
+    def get(self, command, repo_name):
+        key = self._key(command, repo_name)
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry and entry[1] > now:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+                return json.loads(entry[0])
+            try:
+                row = self._connection().execute(
+                    "SELECT value, expires FROM intents WHERE key = ? AND expires > ?", (key, now)
+                ).fetchone()
+            except (sqlite3.Error, OSError):
+                row = None
+            if row:
+                self._remember(key, row[0], row[1])
+                self.disk_hits += 1
+                return json.loads(row[0])
+            self.misses += 1
+            return None
+
+    def put(self, command, repo_name, intent):
+        key = self._key(command, repo_name)
+        value = json.dumps(intent)
+        expires = time.time() + self.ttl
+        with self._lock:
+            self._remember(key, value, expires)
+            try:
+                db = self._connection()
+                db.execute("INSERT OR REPLACE INTO intents VALUES (?, ?, ?)", (key, value, expires))
+                db.execute("DELETE FROM intents WHERE expires <= ?", (time.time(),))
+                db.commit()
+            except (sqlite3.Error, OSError):
+                pass  # the memory tier still works if the disk is unavailable or read-only
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            try:
+                self._connection().execute("DELETE FROM intents")
+                self._connection().commit()
+            except (sqlite3.Error, OSError):
+                pass
+
+    def stats(self):
+        with self._lock:
+            lookups = self.memory_hits + self.disk_hits + self.misses
+            hits = self.memory_hits + self.disk_hits
+            return {
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": round(hits / lookups, 3) if lookups else 0.0,
+                "memory_entries": len(self._memory),
+            }
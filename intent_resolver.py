@@ -0,0 +1,227 @@
+# intent_resolver.py
+import re
+import threading
+import time
+from datetime import datetime
+
+# Order matters: the first pattern that matches wins
+INTENT_PATTERNS = [
+    {
+        "pattern": r"create (?:a )?(?:new )?(?:pull request|pr) from (\w+) to (\w+)(?: with title ['\"]([^'\"]+)['\"])?(?: and description ['\"]([^'\"]+)['\"])?",
+        "intent": "create_pr",
+        "params": ["head", "base", "title", "body"]
+    },
+    {
+        "pattern": r"create (?:a )?(?:new )?(?:pull request|pr) in this repo",
+        "intent": "create_pr",
+        "params": ["head", "base", "title", "body"]
+    },
+    {
+        "pattern": r"merge (?:pull request|pr) #?(\d+)(?: with message ['\"]([^'\"]+)['\"])?",
+        "intent": "merge_pr",
+        "params": ["pr_number", "message"]
+    },
+    {
+        "pattern": r"comment on (?:pull request|pr) #?(\d+) with ['\"]([^'\"]+)['\"]",
+        "intent": "comment_pr",
+        "params": ["pr_number", "comment"]
+    },
+    {
+        "pattern": r"create (?:a )?(?:new )?issue(?: with title ['\"]([^'\"]+)['\"])?(?: and body ['\"]([^'\"]+)['\"])?",
+        "intent": "create_issue",
+        "params": ["title", "body"]
+    },
+    {
+        "pattern": r"comment on issue #?(\d+) with ['\"]([^'\"]+)['\"]",
+        "intent": "comment_issue",
+        "params": ["issue_number", "comment"]
+    },
+    {
+        "pattern": r"(?:list|show) (open|closed)? ?(issues|pull requests|branches|commits)(?: of this repositor(?:y|ies))?",
+        "intent": "list_items",
+        "params": ["state", "item_type"]
+    },
+    {
+        "pattern": r"view file ['\"]([^'\"]+)['\"](?: on branch (\w+))?",
+        "intent": "view_file",
+        "params": ["file_path", "branch"]
+    },
+    {
+        "pattern": r"view commit #?(\w+(?:\.{3}\w+)?)",
+        "intent": "view_commit",
+        "params": ["commit_sha"]
+    },
+    {
+        "pattern": r"list comments on issue #?(\d+)",
+        "intent": "list_issue_comments",
+        "params": ["issue_number"]
+    },
+    {
+        "pattern": r"(?:give me a )?summary of (?:this |the )?repo(?:sitory)?",
+        "intent": "repo_summary",
+        "params": []
+    },
+]
+
+# Keyword params compared verbatim by execute_actions
+_LOWERCASE_PARAMS = {"state", "item_type"}
+
+WRITE_INTENTS = {"create_pr", "merge_pr", "comment_pr", "create_issue", "comment_issue"}
+
+_QUOTED = re.compile(r"""(['"][^'"]*['"])""")
+# "a and b", "a, then b", "a; b"
+_CONNECTOR = re.compile(r"(\s*;\s*|,?\s+(?:and then|then|and)\s+)", re.IGNORECASE)
+
+
+def _compile(patterns):
+    """
+    Fold every pattern into one alternation so a command is scanned once.
+    Each alternative is wrapped in a named group; its own groups follow it.
+    """
+    parts, slots, index = [], {}, 1
+    for i, p in enumerate(patterns):
+        width = re.compile(p["pattern"]).groups
+        parts.append(f"(?P<p{i}>{p['pattern']})")
+        slots[f"p{i}"] = (p, index + 1, index + 1 + width)
+        index += 1 + width
+    return re.compile("|".join(parts), re.IGNORECASE), slots
+
+
+_MATCHER, _SLOTS = _compile(INTENT_PATTERNS)
+
+
+def _build(p, values, repo_name):
+    result = {"intent": p["intent"], "params": {}}
+    if p["intent"] == "create_pr" and len(values) == 0:
+        # Default values for generic PR creation
+        result["params"] = {
+            "head": "feature",  # Default head branch
+            "base": "main",     # Default base branch
+            "title": f"PR for {repo_name} on {datetime.now().strftime('%Y-%m-%d')}",
+            "body": ""
+        }
+        return result
+    for param, value in zip(p["params"], values):
+        if value:
+            result["params"][param] = value.lower() if param in _LOWERCASE_PARAMS else value
+    # Set defaults for optional params
+    if p["intent"] == "create_pr" and "title" not in result["params"]:
+        result["params"]["title"] = f"PR from {result['params']['head']} to {result['params']['base']}"
+        result["params"]["body"] = result["params"].get("body", "")
+    if p["intent"] == "merge_pr" and "message" not in result["params"]:
+        result["params"]["message"] = "Merged via MCP"
+    if p["intent"] == "create_issue" and "title" not in result["params"]:
+        result["params"]["title"] = f"Issue created on {datetime.now().strftime('%Y-%m-%d')}"
+        result["params"]["body"] = result["params"].get("body", "")
+    if p["intent"] == "view_file" and "branch" not in result["params"]:
+        result["params"]["branch"] = "main"
+    if p["intent"] == "list_items" and "state" not in result["params"]:
+        result["params"]["state"] = "open"
+    return result
+
+
+def match_intent(command, repo_name, full=True):
+    """
+    Resolve a command with the compiled pattern table.
+    full=True only accepts commands the table covers end to end (a confident match);
+    full=False accepts any command that starts with a known pattern.
+    Returns None when nothing matches.
+    """
+    text = re.sub(r"\s+", " ", command.strip())
+    match = _MATCHER.fullmatch(text.rstrip(".!? ")) if full else _MATCHER.match(text)
+    if not match:
+        return None
+    p, start, end = _SLOTS[match.lastgroup]
+    return _build(p, match.groups()[start - 1:end - 1], repo_name)
+
+
+def split_command(command):
+    """
+    Split a compound command on 'and' / 'then' / ';' outside quoted text.
+    Returns (pieces, connectors) where connectors[i] sits between pieces[i] and pieces[i + 1].
+    """
+    pieces, connectors, current = [], [], ""
+    for i, part in enumerate(_QUOTED.split(command.strip())):
+        if i % 2:
+            current += part
+            continue
+        chunks = _CONNECTOR.split(part)
+        current += chunks[0]
+        for connector, text in zip(chunks[1::2], chunks[2::2]):
+            pieces.append(current)
+            connectors.append(connector)
+            current = text
+    pieces.append(current)
+    return pieces, connectors
+
+
+def link_actions(actions, sequential):
+    """
+    Fill in depends_on (indexes of earlier actions) for a plan.
+    sequential[i] marks an explicit 'then' before action i. Writes keep their order,
+    and a read waits for the last write before it so it sees that change.
+    """
+    last_write = None
+    for i, action in enumerate(actions):
+        depends_on = set()
+        if sequential[i] and i > 0:
+            depends_on.add(i - 1)
+        if last_write is not None:
+            depends_on.add(last_write)
+        if action["intent"] in WRITE_INTENTS:
+            last_write = i
+        action["depends_on"] = sorted(depends_on)
+    return actions
+
+
+def match_plan(command, repo_name):
+    """
+    Resolve a compound command into {"actions": [...]} when every step is a
+    confident match; adjacent pieces are re-joined when the split cut through
+    one command (e.g. "... with title 'x' and description 'y'"). Returns None otherwise.
+    """
+    pieces, connectors = split_command(command)
+    if len(pieces) < 2:
+        return None
+    actions, sequential, i = [], [], 0
+    while i < len(pieces):
+        # Longest run of pieces that still reads as a single command
+        for j in range(len(pieces), i, -1):
+            text = pieces[i] + "".join(c + p for c, p in zip(connectors[i:j - 1], pieces[i + 1:j]))
+            action = match_intent(text, repo_name)
+            if action is not None:
+                break
+        else:
+            return None
+        actions.append(action)
+        sequential.append(i > 0 and "then" in connectors[i - 1].lower())
+        i = j
+    if len(actions) < 2:
+        return None
+    return {"actions": link_actions(actions, sequential)}
+
+
+class TierStats:
+    """Hit counts and cumulative latency per resolution tier"""
+
+    def __init__(self, tiers):
+        self._lock = threading.Lock()
+        self.tiers = {name: {"hits": 0, "seconds": 0.0} for name in tiers}
+
+    def record(self, tier, started):
+        with self._lock:
+            entry = self.tiers[tier]
+            entry["hits"] += 1
+            entry["seconds"] += time.perf_counter() - started
+
+    def stats(self):
+        with self._lock:
+            total = sum(t["hits"] for t in self.tiers.values())
+            return {
+                name: {
+                    "hits": t["hits"],
+                    "share": round(t["hits"] / total, 3) if total else 0.0,
+                    "avg_ms": round(t["seconds"] / t["hits"] * 1000, 3) if t["hits"] else 0.0,
+                }
+                for name, t in self.tiers.items()
+            }
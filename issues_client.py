@@ -1,34 +1,47 @@
 # issues_client.py
 
-from github import Github
-from dotenv import load_dotenv
-import os
-load_dotenv()
-token = os.getenv("GITHUB_TOKEN")
-g = Github(token)
+from github_session import get_repo, scheduled, note_github_error, get_page, paginate, parse_timestamp
+from repo_counts import forget_counts
 
 def list_issues(repo_name, state="open"):
     """List issues in a repository (open or closed)"""
     try:
-        repo = g.get_repo(repo_name)
-        issues = repo.get_issues(state=state)
+        issues = paginate(f"/repos/{repo_name}/issues", {"state": state})
         issue_list = []
         for issue in issues:
-            if issue.pull_request is None:  # Ignore PRs
+            if "pull_request" not in issue:  # Ignore PRs
                 issue_list.append({
-                    "number": issue.number,
-                    "title": issue.title,
-                    "creator": issue.user.login,
-                    "created_at": issue.created_at.strftime('%Y-%m-%d %H:%M')
+                    "number": issue["number"],
+                    "title": issue["title"],
+                    "creator": issue["user"]["login"],
+                    "created_at": parse_timestamp(issue["created_at"]).strftime('%Y-%m-%d %H:%M')
                 })
         return issue_list
     except Exception as e:
         return f"[ERROR] Failed to list issues: {str(e)}"
 
+def list_issues_page(repo_name, state="open", page=1, per_page=30):
+    """
+    List one page of issues (open or closed).
+    Returns (issues, has_next); PRs are filtered out, so a page may hold fewer than per_page.
+    """
+    try:
+        issues, links = get_page(f"/repos/{repo_name}/issues", {"state": state, "page": page, "per_page": per_page})
+        issue_list = [{
+            "number": issue["number"],
+            "title": issue["title"],
+            "creator": issue["user"]["login"],
+            "created_at": parse_timestamp(issue["created_at"]).strftime('%Y-%m-%d %H:%M')
+        } for issue in issues if "pull_request" not in issue]
+        return issue_list, "next" in links
+    except Exception as e:
+        return f"[ERROR] Failed to list issues: {str(e)}", False
+
+@scheduled("interactive")
 def list_issue_comments(repo_name, issue_number):
     """Get all comments on a specific issue"""
     try:
-        repo = g.get_repo(repo_name)
+        repo = get_repo(repo_name)
         issue = repo.get_issue(number=issue_number)
         comments = issue.get_comments()
         return [{
@@ -37,23 +50,28 @@ def list_issue_comments(repo_name, issue_number):
             "body": comment.body
         } for comment in comments]
     except Exception as e:
+        note_github_error(e)
         return f"[ERROR] Could not fetch comments: {str(e)}"
 
+@scheduled("write")
 def add_issue_comment(repo_name, issue_number, comment_body):
     """Add a comment to a specific issue"""
     try:
-        repo = g.get_repo(repo_name)
+        repo = get_repo(repo_name)
         issue = repo.get_issue(number=issue_number)
         issue.create_comment(comment_body)
         return "✅ Comment added successfully."
     except Exception as e:
+        note_github_error(e)
         return f"[ERROR] Failed to add comment: {str(e)}"
 
+@scheduled("write")
 def create_issue(repo_name, title, body=""):
     """Create a new issue in the specified repository"""
     try:
-        repo = g.get_repo(repo_name)
+        repo = get_repo(repo_name)
         issue = repo.create_issue(title=title, body=body)
+        forget_counts(repo_name)
         return {
             "message": f"✅ Issue #{issue.number} created successfully.",
             "number": issue.number,
@@ -61,4 +79,5 @@ def create_issue(repo_name, title, body=""):
             "created_at": issue.created_at.strftime('%Y-%m-%d %H:%M')
         }
     except Exception as e:
+        note_github_error(e)
         return {"error": f"[ERROR] Failed to create issue: {str(e)}"}
@@ -1,28 +1,149 @@
 # llm_agent.py
-import requests
-import os
 import json
-from openai import OpenAI
+import os
+import random
+import threading
+import time
+import requests
+from requests.adapters import HTTPAdapter
 from dotenv import load_dotenv
+from context_format import read_context
+from circuit_breaker import CircuitOpenError, get_breaker
 load_dotenv()
-client = OpenAI(
-    base_url="https://openrouter.ai/api/v1",
-    api_key=os.getenv("OPENROUTER_API_KEY")
-)
 OPENROUTER_API_KEY = os.getenv("OPENROUTER_API_KEY")
-MODEL = "openrouter/cypher-alpha:free"
+OPENROUTER_URL = "https://openrouter.ai/api/v1/chat/completions"
+MODEL = os.getenv("OPENROUTER_MODEL", "meta-ai/llama-3.1-8b-instruct:free")
+
+# Transport settings, overridable from .env
+LLM_POOL_SIZE = int(os.getenv("LLM_POOL_SIZE", "4"))
+LLM_CONNECT_TIMEOUT = float(os.getenv("LLM_CONNECT_TIMEOUT", "5"))
+# Longest silence allowed between streamed chunks
+LLM_READ_TIMEOUT = float(os.getenv("LLM_READ_TIMEOUT", "20"))
+# Wall-clock budget for one ask_llm call, retries included
+LLM_DEADLINE = float(os.getenv("LLM_DEADLINE", "45"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "2"))
+RETRY_STATUS = (429, 500, 502, 503, 504)
+# Failed calls in a row before commands skip the LLM and go straight to the local parser
+LLM_BREAKER_THRESHOLD = int(os.getenv("LLM_BREAKER_THRESHOLD", "3"))
+LLM_BREAKER_RESET = float(os.getenv("LLM_BREAKER_RESET", "30"))
+
+_lock = threading.Lock()
+_session = None
+_breaker = get_breaker("llm", LLM_BREAKER_THRESHOLD, LLM_BREAKER_RESET)
+
 
-def load_context(path="mcp.json"):
+def get_session():
+    """Shared keep-alive session for OpenRouter calls"""
+    global _session
+    if _session is None:
+        with _lock:
+            if _session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=LLM_POOL_SIZE)
+                session.mount("https://", adapter)
+                _session = session
+    return _session
+
+def load_context(path="mcp.json", sections=None):
+    """Load an MCP context file; sections limits decoding to those sections for .mcpx files"""
     try:
-        with open(path, "r") as f:
-            return json.load(f)
+        return read_context(path, sections)
     except Exception as e:
         return {"error": str(e)}
 
+def _object_end(text, start):
+    """Index just past the object opening at text[start], or None while it is still incomplete"""
+    depth, in_string, escaped = 0, False, False
+    for i in range(start, len(text)):
+        c = text[i]
+        if in_string:
+            if escaped:
+                escaped = False
+            elif c == "\\":
+                escaped = True
+            elif c == '"':
+                in_string = False
+        elif c == '"':
+            in_string = True
+        elif c == "{":
+            depth += 1
+        elif c == "}":
+            depth -= 1
+            if depth == 0:
+                return i + 1
+    return None
+
+
+def extract_json(text):
+    """
+    Return the first complete top-level JSON object in text, or None.
+    Works on bare JSON, JSON inside ```json fences and JSON surrounded by prose.
+    Objects nested in one that is still incomplete (a reply being streamed) are never returned.
+    """
+    start = text.find("{")
+    while start != -1:
+        end = _object_end(text, start)
+        if end is None:
+            return None
+        try:
+            obj = json.loads(text[start:end])
+            if isinstance(obj, dict):
+                return obj
+        except ValueError:
+            pass
+        start = text.find("{", end)
+    return None
+
+
+def _backoff(attempt, retry_after=None):
+    """Exponential backoff with full jitter; Retry-After wins when the server sends one"""
+    if retry_after:
+        try:
+            return float(retry_after)
+        except ValueError:
+            pass
+    return random.uniform(0, 0.5 * 2 ** attempt)
+
+
+def _stream_completion(payload, headers, deadline):
+    """
+    Stream one chat completion and stop reading as soon as a JSON object is complete.
+    Returns the JSON text, or the whole reply when it holds no JSON.
+    """
+    timeout = (LLM_CONNECT_TIMEOUT, LLM_READ_TIMEOUT)
+    with get_session().post(OPENROUTER_URL, headers=headers, json=payload, stream=True, timeout=timeout) as response:
+        response.raise_for_status()
+        # text/event-stream is UTF-8 by spec; without a charset requests would assume ISO-8859-1
+        response.encoding = "utf-8"
+        reply = ""
+        for line in response.iter_lines(chunk_size=None, decode_unicode=True):
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"no complete answer within {LLM_DEADLINE}s")
+            # Server-sent events; lines starting with ':' are keep-alive comments
+            if not line or not line.startswith("data: "):
+                continue
+            data = line[len("data: "):]
+            if data == "[DONE]":
+                break
+            chunk = json.loads(data)
+            if "error" in chunk:
+                raise Exception(chunk["error"].get("message", chunk["error"]))
+            choices = chunk.get("choices") or [{}]
+            delta = choices[0].get("delta", {}).get("content") or ""
+            reply += delta
+            if "}" in delta:
+                obj = extract_json(reply)
+                if obj is not None:
+                    return json.dumps(obj)
+    obj = extract_json(reply)
+    return json.dumps(obj) if obj is not None else reply
+
 def ask_llm(prompt, repo_name):
     """
     Query OpenRouter LLM to parse natural language commands and map to GitHub actions.
-    Returns a JSON string with intent and parameters.
+    Returns a JSON string with intent and parameters (the raw reply if it holds no JSON).
+    Streams the answer over a pooled session, bounded by LLM_DEADLINE; after repeated
+    failures the "llm" circuit breaker fails calls immediately until a probe succeeds.
     """
     if not OPENROUTER_API_KEY:
         raise Exception("OPENROUTER_API_KEY not set in environment variables")
@@ -43,37 +164,63 @@ You are an AI assistant for a GitHub repository management tool. Your task is to
 - comment_issue: Comment on an issue (params: issue_number, comment)
 - list_items: List issues, pull requests, branches, or commits (params: state, item_type)
 - view_file: View file content (params: file_path, branch)
-- view_commit: View commit details (params: commit_sha)
+- view_commit: View commit details, or compare a range written as base...head (params: commit_sha)
 - list_issue_comments: List comments on an issue (params: issue_number)
 - repo_summary: Summarize the repository (no params)
 
 For ambiguous commands (e.g., 'create a new pull request in this repo'), assume reasonable defaults (head='feature', base='main', title='PR for {repo_name}', body=''). Return JSON like:
 ```json
-{"intent": "create_pr", "params": {"head": "feature", "base": "main", "title": "PR for repo", "body": ""}}
+{{"intent": "create_pr", "params": {{"head": "feature", "base": "main", "title": "PR for repo", "body": ""}}}}
+```
+For commands with several steps (e.g. 'create an issue and list open issues'), return the steps in order, where depends_on lists the indexes of earlier steps that must finish first:
+```json
+{{"actions": [{{"intent": "create_issue", "params": {{"title": "Bug", "body": ""}}, "depends_on": []}}, {{"intent": "list_items", "params": {{"state": "open", "item_type": "issues"}}, "depends_on": [0]}}]}}
 ```
 or
 ```json
-{"error": "Could not understand command"}
+{{"error": "Could not understand command"}}
 ```
 Command: {prompt}
 """
     
-    data = {
-        "model": "meta-ai/llama-3.1-8b-instruct:free",
+    payload = {
+        "model": MODEL,
+        "stream": True,
         "messages": [
             {"role": "system", "content": system_prompt},
             {"role": "user", "content": prompt}
         ]
     }
 
+    if not _breaker.allow():
+        raise CircuitOpenError(f"OpenRouter is unavailable (circuit open, next probe in {_breaker.retry_in()}s)")
     try:
-        response = requests.post(
-            "https://openrouter.ai/api/v1/chat/completions",
-            headers=headers,
-            json=data
-        )
-        response.raise_for_status()
-        result = response.json()
-        return result["choices"][0]["message"]["content"]
-    except Exception as e:
-        raise Exception(f"OpenRouter API failed: {str(e)}")
+        reply = _complete(payload, headers)
+    except Exception:
+        _breaker.record_failure()
+        raise
+    _breaker.record_success()
+    return reply
+
+
+def _complete(payload, headers):
+    """Run one completion with bounded, jittered retries inside LLM_DEADLINE"""
+    deadline = time.monotonic() + LLM_DEADLINE
+    for attempt in range(LLM_MAX_RETRIES + 1):
+        retry_after = None
+        try:
+            return _stream_completion(payload, headers, deadline)
+        except requests.HTTPError as e:
+            status = e.response.status_code if e.response is not None else None
+            if status not in RETRY_STATUS or attempt == LLM_MAX_RETRIES:
+                raise Exception(f"OpenRouter API failed: {str(e)}")
+            retry_after = e.response.headers.get("Retry-After")
+        except (requests.ConnectionError, requests.Timeout, requests.exceptions.ChunkedEncodingError) as e:
+            if attempt == LLM_MAX_RETRIES:
+                raise Exception(f"OpenRouter API failed: {str(e)}")
+        except Exception as e:
+            raise Exception(f"OpenRouter API failed: {str(e)}")
+        pause = _backoff(attempt, retry_after)
+        if time.monotonic() + pause >= deadline:
+            raise Exception(f"OpenRouter API failed: no answer within {LLM_DEADLINE}s")
+        time.sleep(pause)
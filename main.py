@@ -1,6 +1,6 @@
 # main.py
 from review_pr import comment_on_pull_request
-from github_client import list_user_repos, get_repo_stats, list_pull_requests, get_file_content, get_repo_topics, add_repo_topics, get_repo_license, update_repo_description
+from github_client import prefetch_user_repos, cached_user_repos, get_repo_stats, list_pull_requests, get_file_content, get_repo_topics, add_repo_topics, get_repo_license, update_repo_description
 from pull_request_ops import create_pull_request
 from merge_pr import merge_pull_request
 from repo_inspect import list_branches
@@ -9,18 +9,25 @@ from repo_inspect import get_commit_diff
 from issues_client import list_issues
 from issues_client import list_issue_comments, add_issue_comment
 from repo_inspect import get_file_tree
-from mcp_exporter import generate_mcp_context
-import json
+from mcp_exporter import refresh_mcp_context, CONTEXT_PATH
+import os
+from file_reader import download_file, PREVIEW_BYTES
 from nlp_executor import interpret_command, execute_actions
+from circuit_breaker import describe_breakers
 
-# 🔁 Step 1: List all repos
-repos = list_user_repos()
+# 🔁 Step 1: List all repos (from the warm cache when possible; GitHub refreshes it in the background)
+repos_future = prefetch_user_repos()
+repos = cached_user_repos()
+if repos is None:
+    repos = repos_future.result()
 print("📦 Your Repositories:")
 for idx, name in enumerate(repos, 1):
     print(f"{idx}. {name}")
 
 # 🔍 Step 2: Ask user for input
 user_prompt = input("\nEnter keyword or exact repo name to explore (e.g., 'ai', 'Brand-Monitoring'): ").lower()
+if repos_future.done() and repos_future.exception() is None:
+    repos = repos_future.result()  # match against the fresh list if it arrived meanwhile
 
 # 🔎 Step 3: Try to match
 matched_repo = None
@@ -56,10 +63,18 @@ if view_tree == "yes":
 view_file = input("\nDo you want to view a specific file's content? (yes/no): ").lower()
 if view_file == "yes":
     file_path = input("Enter full file path (e.g., main.py or src/utils.py): ").strip()
-    content = get_file_content(matched_repo, file_path, branch=selected_branch)
+    content = get_file_content(matched_repo, file_path, branch=selected_branch, max_bytes=PREVIEW_BYTES)
     if isinstance(content, str):
         print(f"\n📄 Content of {file_path}:\n")
         print(content[:1000])  # Show first 1000 characters
+        save = input("\nSave the full file to disk? (yes/no): ").strip().lower()
+        if save == "yes":
+            dest = input(f"Save as (default: {os.path.basename(file_path)}): ").strip() or os.path.basename(file_path)
+            try:
+                size = download_file(matched_repo, file_path, dest, ref=selected_branch)
+                print(f"✅ Saved {size} bytes to {dest}")
+            except Exception as e:
+                print(f"[ERROR] Could not download file: {e}")
     else:
         print("❌ Could not retrieve file content.")
 
@@ -103,11 +118,23 @@ else:
 # Ask if user wants commit details
 view_diff = input("\nDo you want to view a commit's file changes? (yes/no): ").lower()
 if view_diff == "yes":
-    commit_sha = input("Enter the full or short SHA of the commit: ").strip()
+    commit_sha = input("Enter the full or short SHA of the commit (or base...head to compare): ").strip()
     summary = get_commit_diff(matched_repo, commit_sha)
     
     if isinstance(summary, str):
         print(summary)  # error
+    elif "merge_base" in summary:
+        print(f"\n🔀 {summary['base']}...{summary['head']}: {summary['status']}, {summary['ahead_by']} ahead / {summary['behind_by']} behind, {summary['total_commits']} commits")
+        if summary["truncated"]:
+            print(f"  (showing the first {len(summary['commits'])} commits)")
+        for c in summary["commits"]:
+            print(f"  - {c['sha'][:7]} {c['author']} {c['date']}: {c['message'].splitlines()[0] if c['message'] else ''}")
+        partial = "" if summary["stats_complete"] else " (listed files only)"
+        print(f"📊 Stats{partial} — Additions: {summary['stats']['additions']}, Deletions: {summary['stats']['deletions']}, Total: {summary['stats']['total']}")
+        print(f"📝 Files Changed ({len(summary['files_changed'])}):")
+        for f in summary["files_changed"]:
+            counts = f"+{f['additions']}/-{f['deletions']}" if f["additions"] is not None else f["status"]
+            print(f"  - {f['filename']} ({counts})")
     else:
         print(f"\n🔍 Commit Message: {summary['message']}")
         print(f"👤 Author: {summary['author']} on {summary['date']}")
@@ -185,7 +212,7 @@ else:
             print(f"PR #{number}: {title}")
 
     print(f"\n📄 File Content (README.md from {matched_repo}):")
-    content = get_file_content(matched_repo, "README.md")
+    content = get_file_content(matched_repo, "README.md", max_bytes=PREVIEW_BYTES)
     print(content[:500])  # Print first 500 chars
 
     # 📌 Phase 2.1: Create PR
@@ -248,19 +275,18 @@ else:
 # 📦 Phase 7: Generate MCP Context File
 generate = input("\nDo you want to generate an MCP context file (mcp.json)? (yes/no): ").lower()
 if generate == "yes":
-    mcp = generate_mcp_context(matched_repo)
+    # Incremental: only items changed since the last export are fetched
+    mcp = refresh_mcp_context(matched_repo, CONTEXT_PATH)
     if "error" in mcp:
         print(f"[ERROR] Failed to generate MCP context: {mcp['error']}")
     else:
-        with open("mcp.json", "w") as f:
-            json.dump(mcp, f, indent=4)
-        print("✅ MCP context file saved as mcp.json")
+        print(f"✅ MCP context file saved as {CONTEXT_PATH}")
 
 ask_llm = input("\n🧠 Do you want to ask a question using a real LLM via OpenRouter? (yes/no): ").strip().lower()
 if ask_llm == "yes":
     from llm_agent import ask_llm
     user_question = input("Ask your question (e.g., 'What are recent PRs?'): ")
-    response = ask_llm(user_question)
+    response = ask_llm(user_question, matched_repo)
     print(f"\n🤖 LLM Response:\n{response}")
 
 # 🤖 Phase 10: Natural Language Command Execution
@@ -272,4 +298,14 @@ if use_nlp == "yes":
         print(f"\n❌ LLM Error: {structured['error']}")
     else:
         result = execute_actions(structured, matched_repo)
-        print(f"\n🤖 Result:\n{result}")
+        if "actions" in structured:
+            print(f"\n🤖 {result['message']} in {result['elapsed_ms']} ms")
+            for step in result["data"]:
+                after = f" (after step {', '.join(map(str, step['depends_on']))})" if step["depends_on"] else ""
+                outcome = step.get("error") or step.get("message")
+                print(f"  {step['step']}. {step['intent']}{after} [{step['elapsed_ms']} ms]: {outcome}")
+                if "data" in step:
+                    print(f"     {step['data']}")
+        else:
+            print(f"\n🤖 Result:\n{result}")
+    print(f"🩺 Backends: {describe_breakers()}")
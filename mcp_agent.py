@@ -1,40 +1,75 @@
 # mcp_agent.py
-import json
+import os
+import re
+from context_store import ContextStore
+from context_format import read_context
+
+# Kept for the lifetime of the process; reloads only when the context file changes
+_store = ContextStore(os.getenv("MCP_CONTEXT_PATH", "mcp.json"))
 
 def load_mcp_context(path="mcp.json"):
     try:
-        with open(path, "r") as f:
-            return json.load(f)
+        return read_context(path)
     except Exception as e:
         return {"error": str(e)}
 
-def run_agent_query(question: str):
-    context = load_mcp_context()
-    if "error" in context:
-        return f"[ERROR] Could not load MCP context: {context['error']}"
+def _describe(section, item):
+    if section == "contributors":
+        return f"- {item['login']} ({item['contributions']} contributions)"
+    if section == "recent_commits":
+        return f"- {item['sha']} | {item['author']} | {item['date']} | {item['message']}"
+    if section == "issue_comments":
+        return f"- #{item['issue_number']} {item['commenter']}: {item['comment_body']}"
+    return f"- #{item['number']}: {item['title']}"
 
-    mc = context.get("modelcontext", {})
-    repo = mc.get("repository", {})
-    contributors = mc.get("contributors", [])
-    commits = mc.get("recent_commits", [])
-    issues = mc.get("open_issues", [])
-    prs = mc.get("open_pull_requests", [])
+def run_agent_query(question: str, store: ContextStore = None):
+    store = store or _store
+    store.refresh()
+    if store.error:
+        return f"[ERROR] Could not load MCP context: {store.error}"
 
+    # Sections are loaded in the branch that needs them, so a question decodes only what it reads
     q = question.lower()
 
+    # Direct lookups through the store's indexes
+    issue_match = re.search(r"issue #?(\d+)", q)
+    sha_match = re.search(r"commit ([0-9a-f]{4,40})\b", q)
+    author_match = re.search(r"commits by ([\w\-. ]+)", q)
+    login_match = re.search(r"contributor ([\w\-]+)", q)
+
+    if issue_match:
+        issue = store.issue(int(issue_match.group(1)))
+        if issue:
+            return _describe("open_issues", issue)
+
+    if sha_match:
+        commit = store.commit(sha_match.group(1))
+        if commit:
+            return _describe("recent_commits", commit)
+
+    if author_match:
+        return "\n".join(_describe("recent_commits", c) for c in store.commits_by(author_match.group(1).strip())) or "No commits by that author."
+
+    if login_match and store.contributor(login_match.group(1)):
+        return _describe("contributors", store.contributor(login_match.group(1)))
+
     if "top contributor" in q or "contributors" in q:
-        return "\n".join([f"- {c['login']} ({c['contributions']} contributions)" for c in contributors]) or "No contributors found."
+        return "\n".join([f"- {c['login']} ({c['contributions']} contributions)" for c in store.section("contributors")]) or "No contributors found."
 
     elif "open issue" in q:
-        return "\n".join([f"- #{i['number']}: {i['title']}" for i in issues]) or "No open issues."
+        return "\n".join([f"- #{i['number']}: {i['title']}" for i in store.section("open_issues")]) or "No open issues."
 
     elif "pull request" in q or "open pr" in q:
-        return "\n".join([f"- #{p['number']}: {p['title']}" for p in prs]) or "No open pull requests."
+        return "\n".join([f"- #{p['number']}: {p['title']}" for p in store.section("open_pull_requests")]) or "No open pull requests."
 
     elif "recent commit" in q or "commits" in q:
-        return "\n".join([f"- {c['sha']} | {c['author']} | {c['date']} | {c['message']}" for c in commits]) or "No recent commits."
+        return "\n".join([f"- {c['sha']} | {c['author']} | {c['date']} | {c['message']}" for c in store.section("recent_commits")]) or "No recent commits."
     elif "describe" in q or "summary" in q or "what is this repo" in q:
+        repo = store.section("repository")
         return f"{repo.get('name')} — {repo.get('description') or 'No description provided.'}"
 
-    else:
-        return "❌ Sorry, I couldn't understand the question. Try asking about contributors, issues, PRs, commits, or repo info."
+    matches = store.search(q)
+    if matches:
+        return "\n".join(_describe(section, item) for section, item in matches)
+
+    return "❌ Sorry, I couldn't understand the question. Try asking about contributors, issues, PRs, commits, or repo info."
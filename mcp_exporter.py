@@ -1,101 +1,154 @@
 # mcp_exporter.py
-from github import Github
 import os
-from dotenv import load_dotenv
-from datetime import datetime
+import json
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from github_session import get_repo, scheduled, note_github_error, forget_repo, api_request, get_page, paginate, parse_timestamp, TRANSPORT
+from graphql_client import fetch_mcp_context
+from context_format import read_context, write_context
+from datetime import datetime, timedelta, timezone
 
-load_dotenv()
-g = Github(os.getenv("GITHUB_TOKEN"))
+# Sections are independent, so they are fetched in parallel on the shared connection pool
+EXPORT_WORKERS = int(os.getenv("MCP_EXPORT_WORKERS", "6"))
+# Window and cap for the repo-wide issue comments stream
+COMMENTS_SINCE_DAYS = int(os.getenv("MCP_COMMENTS_SINCE_DAYS", "90"))
+COMMENTS_SCAN_LIMIT = int(os.getenv("MCP_COMMENTS_SCAN_LIMIT", "100"))
+# Where the context is saved; a .mcpx extension selects the section-indexed format
+CONTEXT_PATH = os.getenv("MCP_CONTEXT_PATH", "mcp.json")
+# Encoding of .mcpx context files
+CONTEXT_CODEC = os.getenv("MCP_CONTEXT_CODEC", "json")
+CONTEXT_COMPRESS = os.getenv("MCP_CONTEXT_COMPRESS", "0") == "1"
 
-def generate_mcp_context(repo_name: str) -> dict:
+
+def _contributors(repo):
+    contributors = repo.get_contributors()[:5]
+    return [
+        {
+            "login": c.login,
+            "html_url": c.html_url,
+            "contributions": c.contributions
+        } for c in contributors
+    ]
+
+
+def _commits(repo):
+    commits = repo.get_commits()[:5]
+    return [
+        {
+            "sha": c.sha,
+            "author": c.commit.author.name if c.commit.author else "Unknown",
+            "message": c.commit.message.split('\n')[0],
+            "date": c.commit.author.date.strftime("%Y-%m-%d")
+        } for c in commits
+    ]
+
+
+def _open_issues(repo):
+    open_issues = repo.get_issues(state="open")[:5]
+    return [
+        {
+            "number": i.number,
+            "title": i.title,
+            "created_at": i.created_at.strftime("%Y-%m-%d"),
+            "user": i.user.login if i.user else "Unknown"
+        } for i in open_issues
+    ]
+
+
+def _closed_issues(repo):
+    closed_issues = repo.get_issues(state="closed")[:5]
+    return [
+        {
+            "number": i.number,
+            "title": i.title,
+            "created_at": i.created_at.strftime("%Y-%m-%d"),
+            "closed_at": i.closed_at.strftime("%Y-%m-%d") if i.closed_at else "N/A",
+            "user": i.user.login if i.user else "Unknown"
+        } for i in closed_issues
+    ]
+
+
+def _issue_comments(repo):
+    """
+    Latest comments (up to 3 each) on the 10 most recently discussed issues.
+    Reads the repo-wide comments stream once instead of one request per issue.
+    """
+    since = datetime.now(timezone.utc) - timedelta(days=COMMENTS_SINCE_DAYS)
+    comments = paginate(
+        f"/repos/{repo.full_name}/issues/comments",
+        {"sort": "created", "direction": "desc", "since": since.strftime("%Y-%m-%dT%H:%M:%SZ")},
+        limit=COMMENTS_SCAN_LIMIT,
+    )
+
+    by_issue = {}
+    for c in comments:
+        number = int(c["issue_url"].rsplit("/", 1)[1])
+        if number not in by_issue and len(by_issue) == 10:
+            continue
+        thread = by_issue.setdefault(number, [])
+        if len(thread) < 3:
+            thread.append(c)
+
+    issue_comments_list = []
+    for number, thread in by_issue.items():
+        for c in reversed(thread):  # oldest first within each issue
+            issue_comments_list.append({
+                "issue_number": number,
+                "comment_body": c["body"][:200],  # limit to 200 chars
+                "commenter": c["user"]["login"] if c.get("user") else "Unknown",
+                "created_at": parse_timestamp(c["created_at"]).strftime("%Y-%m-%d")
+            })
+    return issue_comments_list
+
+
+def _pull_requests(repo):
+    pull_requests = repo.get_pulls(state="open")[:5]
+    return [
+        {
+            "number": pr.number,
+            "title": pr.title,
+            "created_at": pr.created_at.strftime("%Y-%m-%d"),
+            "user": pr.user.login if pr.user else "Unknown"
+        } for pr in pull_requests
+    ]
+
+
+SECTIONS = {
+    "contributors": _contributors,
+    "recent_commits": _commits,
+    "open_issues": _open_issues,
+    "closed_issues": _closed_issues,
+    "issue_comments": _issue_comments,
+    "open_pull_requests": _pull_requests,
+}
+
+
+@scheduled("background")
+def _isolated(fetch, repo):
+    """Run one section; a failing section yields an empty list instead of failing the export"""
+    try:
+        return fetch(repo)
+    except Exception as e:
+        note_github_error(e)
+        return []
+
+
+@scheduled("background")
+def generate_mcp_context(repo_name: str, transport: str = None) -> dict:
     try:
-        repo = g.get_repo(repo_name)
-
-        # Contributors
-        try:
-            contributors = repo.get_contributors()[:5]
-            contributors_list = [
-                {
-                    "login": c.login,
-                    "html_url": c.html_url,
-                    "contributions": c.contributions
-                } for c in contributors
-            ]
-        except Exception:
-            contributors_list = []
-
-        # Commits
-        try:
-            commits = repo.get_commits()[:5]
-            commits_list = [
-                {
-                    "sha": c.sha,
-                    "author": c.commit.author.name if c.commit.author else "Unknown",
-                    "message": c.commit.message.split('\n')[0],
-                    "date": c.commit.author.date.strftime("%Y-%m-%d")
-                } for c in commits
-            ]
-        except Exception:
-            commits_list = []
-
-        # Open Issues
-        try:
-            open_issues = repo.get_issues(state="open")[:5]
-            open_issues_list = [
-                {
-                    "number": i.number,
-                    "title": i.title,
-                    "created_at": i.created_at.strftime("%Y-%m-%d"),
-                    "user": i.user.login if i.user else "Unknown"
-                } for i in open_issues
-            ]
-        except Exception:
-            open_issues_list = []
-
-        # Closed Issues
-        try:
-            closed_issues = repo.get_issues(state="closed")[:5]
-            closed_issues_list = [
-                {
-                    "number": i.number,
-                    "title": i.title,
-                    "created_at": i.created_at.strftime("%Y-%m-%d"),
-                    "closed_at": i.closed_at.strftime("%Y-%m-%d") if i.closed_at else "N/A",
-                    "user": i.user.login if i.user else "Unknown"
-                } for i in closed_issues
-            ]
-        except Exception:
-            closed_issues_list = []
-
-        # Issue Comments (for open + closed)
-        try:
-            issue_comments_list = []
-            all_issues = list(repo.get_issues(state="all"))[:10]
-            for issue in all_issues:
-                comments = issue.get_comments()[:3]
-                for c in comments:
-                    issue_comments_list.append({
-                        "issue_number": issue.number,
-                        "comment_body": c.body[:200],  # limit to 200 chars
-                        "commenter": c.user.login if c.user else "Unknown",
-                        "created_at": c.created_at.strftime("%Y-%m-%d")
-                    })
-        except Exception:
-            issue_comments_list = []
-
-        # Pull Requests
-        try:
-            pull_requests = repo.get_pulls(state="open")[:5]
-            prs_list = [
-                {
-                    "number": pr.number,
-                    "title": pr.title,
-                    "created_at": pr.created_at.strftime("%Y-%m-%d"),
-                    "user": pr.user.login if pr.user else "Unknown"
-                } for pr in pull_requests
-            ]
-        except Exception:
-            prs_list = []
+        if (transport or TRANSPORT) == "graphql":
+            return fetch_mcp_context(repo_name)
+
+        repo = get_repo(repo_name)
+
+        with ThreadPoolExecutor(max_workers=EXPORT_WORKERS) as pool:
+            # Each task runs in a copy of this context so it keeps the lane and credential
+            topics = pool.submit(contextvars.copy_context().run, scheduled("background")(repo.get_topics))
+            futures = {
+                name: pool.submit(contextvars.copy_context().run, _isolated, fetch, repo)
+                for name, fetch in SECTIONS.items()
+            }
+            sections = {name: future.result() for name, future in futures.items()}
 
         # Final MCP context
         mcp = {
@@ -107,20 +160,234 @@ def generate_mcp_context(repo_name: str) -> dict:
                     "url": repo.html_url,
                     "stars": repo.stargazers_count,
                     "forks": repo.forks_count,
-                    "topics": repo.get_topics(),
+                    "topics": topics.result(),
                     "created_at": repo.created_at.strftime("%Y-%m-%d"),
                     "updated_at": repo.updated_at.strftime("%Y-%m-%d"),
                 },
-                "contributors": contributors_list,
-                "recent_commits": commits_list,
-                "open_issues": open_issues_list,
-                "closed_issues": closed_issues_list,
-                "issue_comments": issue_comments_list,
-                "open_pull_requests": prs_list
+                **sections
             }
         }
 
         return mcp
 
+    except Exception as e:
+        note_github_error(e)
+        return {"error": str(e)}
+
+
+# --- Incremental refresh -------------------------------------------------
+
+def _iso(dt):
+    return dt.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def _day(value):
+    return parse_timestamp(value).strftime("%Y-%m-%d") if value else "N/A"
+
+
+def _user(item):
+    return item["user"]["login"] if item.get("user") else "Unknown"
+
+
+def _merge_latest(existing, changed, key="number", limit=5):
+    """Replace changed items in a 'newest created first' list and keep the top limit"""
+    changed_keys = {item[key] for item in changed}
+    merged = [item for item in existing if item[key] not in changed_keys] + changed
+    merged.sort(key=lambda item: (item["created_at"], item[key]), reverse=True)
+    return merged[:limit]
+
+
+def _refresh_commits(repo_name, mc, since):
+    commits = paginate(f"/repos/{repo_name}/commits", {"since": since}, limit=5)
+    if not commits:
+        return False
+    new = [
+        {
+            "sha": c["sha"],
+            "author": c["commit"]["author"]["name"] if c["commit"].get("author") else "Unknown",
+            "message": c["commit"]["message"].split('\n')[0],
+            "date": _day(c["commit"]["author"]["date"])
+        } for c in commits
+    ]
+    shas = {c["sha"] for c in new}
+    mc["recent_commits"] = (new + [c for c in mc.get("recent_commits", []) if c["sha"] not in shas])[:5]
+    return True
+
+
+def _refresh_issues(repo, mc, since):
+    changed = paginate(f"/repos/{repo.full_name}/issues", {"state": "all", "sort": "updated", "since": since})
+    if not changed:
+        return
+    opened = [
+        {
+            "number": i["number"],
+            "title": i["title"],
+            "created_at": _day(i["created_at"]),
+            "user": _user(i)
+        } for i in changed if i["state"] == "open"
+    ]
+    closed = [
+        {
+            "number": i["number"],
+            "title": i["title"],
+            "created_at": _day(i["created_at"]),
+            "closed_at": _day(i["closed_at"]),
+            "user": _user(i)
+        } for i in changed if i["state"] == "closed"
+    ]
+    numbers = {i["number"] for i in changed}
+    for section, fresh, fetch in (("open_issues", opened, _open_issues), ("closed_issues", closed, _closed_issues)):
+        existing = mc.get(section, [])
+        kept = [i for i in existing if i["number"] not in numbers]
+        if len(existing) == 5 and len(kept) + len(fresh) < 5:
+            # An item left this state; only a full read can tell what moves up
+            mc[section] = _isolated(fetch, repo)
+        else:
+            mc[section] = _merge_latest(kept, fresh)
+
+
+def _refresh_comments(repo_name, mc, since):
+    comments = paginate(
+        f"/repos/{repo_name}/issues/comments",
+        {"sort": "created", "direction": "desc", "since": since},
+        limit=COMMENTS_SCAN_LIMIT,
+    )
+    if not comments:
+        return
+
+    # Threads ordered by latest activity, newest comment first
+    threads = {}
+    for c in comments:
+        number = int(c["issue_url"].rsplit("/", 1)[1])
+        threads.setdefault(number, []).append({
+            "issue_number": number,
+            "comment_body": c["body"][:200],
+            "commenter": _user(c),
+            "created_at": _day(c["created_at"])
+        })
+    previous = {}
+    for entry in mc.get("issue_comments", []):
+        previous.setdefault(entry["issue_number"], []).append(entry)
+    for number, entries in previous.items():
+        thread = threads.setdefault(number, [])
+        thread.extend(entry for entry in reversed(entries) if entry not in thread)
+
+    mc["issue_comments"] = [
+        entry
+        for thread in list(threads.values())[:10]
+        for entry in reversed(thread[:3])
+    ]
+
+
+def _refresh_pulls(repo, mc, since):
+    changed = []
+    for page in range(1, 100):
+        body, links = get_page(
+            f"/repos/{repo.full_name}/pulls",
+            {"state": "all", "sort": "updated", "direction": "desc", "per_page": 50, "page": page},
+        )
+        recent = [pr for pr in body if pr["updated_at"] >= since]
+        changed.extend(recent)
+        if len(recent) < len(body) or "next" not in links:
+            break
+    if not changed:
+        return
+    opened = [
+        {
+            "number": pr["number"],
+            "title": pr["title"],
+            "created_at": _day(pr["created_at"]),
+            "user": _user(pr)
+        } for pr in changed if pr["state"] == "open"
+    ]
+    numbers = {pr["number"] for pr in changed}
+    existing = mc.get("open_pull_requests", [])
+    kept = [pr for pr in existing if pr["number"] not in numbers]
+    if len(existing) == 5 and len(kept) + len(opened) < 5:
+        mc["open_pull_requests"] = _isolated(_pull_requests, repo)
+    else:
+        mc["open_pull_requests"] = _merge_latest(kept, opened)
+
+
+def save_mcp_context(mcp, path=CONTEXT_PATH):
+    """Write mcp.json; a .mcpx path selects the section-indexed format"""
+    if path.endswith(".mcpx"):
+        write_context(mcp, path, codec=CONTEXT_CODEC, compress=CONTEXT_COMPRESS)
+    else:
+        with open(path, "w") as f:
+            json.dump(mcp, f, indent=4)
+
+
+def _revalidate(url, etag, params=None):
+    """(unchanged, etag) for a conditional GET; any answer but 200 / 304 is an error"""
+    response = api_request("GET", url, params=params, headers={"If-None-Match": etag} if etag else {})
+    if response.status_code not in (200, 304):
+        raise Exception(f"GET {url} failed with HTTP {response.status_code}")
+    return response.status_code == 304, response.headers.get("ETag") or etag
+
+
+@scheduled("background")
+def refresh_mcp_context(repo_name: str, path: str = CONTEXT_PATH) -> dict:
+    """
+    Bring an existing mcp.json up to date and save it.
+    Per-section high-water marks are kept under "sync"; only items updated since then
+    are fetched and merged. If both the repo event feed and the repository itself are
+    unchanged (ETag 304) nothing else is requested. Falls back to a full export when the
+    file is missing or for another repo.
+    """
+    started = _iso(datetime.now(timezone.utc))
+    try:
+        mcp = read_context(path)
+    except (OSError, ValueError):
+        mcp = {}
+
+    mc = mcp.get("modelcontext", {})
+    sync = mcp.get("sync", {})
+    same_repo = mc.get("repository", {}).get("name", "").lower() == repo_name.lower()
+
+    try:
+        etags = sync if same_repo else {}
+        events_unchanged, events_etag = _revalidate(f"/repos/{repo_name}/events", etags.get("events_etag"), {"per_page": 1})
+        # The event feed lags and has no events for description, topic or settings edits,
+        # so the repository itself is revalidated too (304s cost no budget)
+        repo_unchanged, repo_etag = _revalidate(f"/repos/{repo_name}", etags.get("repo_etag"))
+        if events_unchanged and repo_unchanged:
+            return mcp
+
+        if not same_repo or "watermarks" not in sync:
+            mcp = generate_mcp_context(repo_name)
+            if "error" in mcp:
+                return mcp
+        else:
+            since = sync["watermarks"]
+            forget_repo(repo_name)
+            repo = get_repo(repo_name)
+            mc["repository"].update({
+                "description": repo.description,
+                "stars": repo.stargazers_count,
+                "forks": repo.forks_count,
+                "topics": repo.get_topics(),
+                "updated_at": repo.updated_at.strftime("%Y-%m-%d"),
+            })
+            if _refresh_commits(repo_name, mc, since["recent_commits"]):
+                mc["contributors"] = _isolated(_contributors, repo)
+            _refresh_issues(repo, mc, since["issues"])
+            _refresh_comments(repo_name, mc, since["issue_comments"])
+            _refresh_pulls(repo, mc, since["open_pull_requests"])
+
+        mcp["sync"] = {
+            "events_etag": events_etag,
+            "repo_etag": repo_etag,
+            "refreshed_at": started,
+            "watermarks": {
+                "recent_commits": started,
+                "issues": started,
+                "issue_comments": started,
+                "open_pull_requests": started,
+            },
+        }
+        save_mcp_context(mcp, path)
+        return mcp
+
     except Exception as e:
         return {"error": str(e)}
@@ -1,18 +1,15 @@
 # merge_pr.py
-from github import Github
-from dotenv import load_dotenv
-import os
-
-load_dotenv()
-token = os.getenv("GITHUB_TOKEN")
-g = Github(token)
+from github_session import get_repo, scheduled, note_github_error
+from repo_counts import forget_counts
+from repo_inspect import forget_branches
 
+@scheduled("write")
 def merge_pull_request(repo_name, pr_number, merge_message="Merging via script"):
     """
     Merge the given PR by number
     """
     try:
-        repo = g.get_repo(repo_name)
+        repo = get_repo(repo_name)
         pr = repo.get_pull(pr_number)
         if pr.is_merged():
             return f"⚠️ PR #{pr_number} is already merged."
@@ -21,6 +18,10 @@ def merge_pull_request(repo_name, pr_number, merge_message="Merging via script")
             return f"❌ PR #{pr_number} is not mergeable right now."
 
         pr.merge(commit_message=merge_message)
+        forget_counts(repo_name)
+        # The head branch may be deleted on merge
+        forget_branches(repo_name)
         return f"✅ Merged PR #{pr_number} successfully!"
     except Exception as e:
+        note_github_error(e)
         return f"[ERROR] Could not merge PR #{pr_number}: {str(e)}"
@@ -3,9 +3,19 @@ from pull_request_ops import create_pull_request
 from merge_pr import merge_pull_request
 from review_pr import comment_on_pull_request
 from issues_client import create_issue, add_issue_comment, list_issues, list_issue_comments
-from repo_inspect import list_branches, list_recent_commits, get_file_tree, get_commit_diff
-import re
-from datetime import datetime
+from repo_inspect import list_branches, branch_exists, list_recent_commits, get_file_tree, get_commit_diff
+from intent_cache import IntentCache
+from file_reader import PREVIEW_BYTES
+from intent_resolver import match_intent, match_plan, link_actions, TierStats
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+import contextvars
+import os
+import time
+
+intent_cache = IntentCache()
+resolver_stats = TierStats(["local", "cache", "llm", "fallback", "unresolved"])
+# Independent steps of a compound command run in parallel
+PLAN_WORKERS = int(os.getenv("PLAN_WORKERS", "4"))
 
 def mock_llm(prompt, repo_name):
     """
@@ -13,133 +23,141 @@ def mock_llm(prompt, repo_name):
     Returns a structured JSON with intent and parameters.
     """
     prompt = prompt.lower().strip()
-  
-    # Patterns for common commands
-    patterns = [
-        {
-            "pattern": r"create (?:a )?(?:new )?pull request from (\w+) to (\w+)(?: with title ['\"](.+)['\"])?(?: and description ['\"](.+)['\"])?",
-            "intent": "create_pr",
-            "params": ["head", "base", "title", "body"]
-        },
-        {
-            "pattern": r"create (?:a )?(?:new )?pull request in this repo",
-            "intent": "create_pr",
-            "params": ["head", "base", "title", "body"]
-        },
-        {
-            "pattern": r"merge pull request #?(\d+)(?: with message ['\"](.+)['\"])?",
-            "intent": "merge_pr",
-            "params": ["pr_number", "message"]
-        },
-        {
-            "pattern": r"comment on pull request #?(\d+) with ['\"](.+)['\"]",
-            "intent": "comment_pr",
-            "params": ["pr_number", "comment"]
-        },
-        {
-            "pattern": r"create (?:a )?(?:new )?issue(?: with title ['\"](.+)['\"])?(?: and body ['\"](.+)['\"])?",
-            "intent": "create_issue",
-            "params": ["title", "body"]
-        },
-        {
-            "pattern": r"comment on issue #?(\d+) with ['\"](.+)['\"]",
-            "intent": "comment_issue",
-            "params": ["issue_number", "comment"]
-        },
-        {
-            "pattern": r"list (open|closed)? ?(issues|pull requests|branches|commits)(?: of this repositor(?:y|ies))?",
-            "intent": "list_items",
-            "params": ["state", "item_type"]
-        },
-        {
-            "pattern": r"view file ['\"](.+)['\"](?: on branch (\w+))?",
-            "intent": "view_file",
-            "params": ["file_path", "branch"]
-        },
-        {
-            "pattern": r"view commit #?(\w+)",
-            "intent": "view_commit",
-            "params": ["commit_sha"]
-        },
-        {
-            "pattern": r"list comments on issue #?(\d+)",
-            "intent": "list_issue_comments",
-            "params": ["issue_number"]
-        },
-        {
-            "pattern": r"(?:give me a )?summary of (?:this |the )?repo(?:sitory)?",
-            "intent": "repo_summary",
-            "params": []
-        },
-    ]
-    
-    for p in patterns:
-        match = re.match(p["pattern"], prompt)
-        if match:
-            result = {"intent": p["intent"], "params": {}}
-            if p["intent"] == "create_pr" and len(match.groups()) == 0:
-                # Default values for generic PR creation
-                result["params"] = {
-                    "head": "feature",  # Default head branch
-                    "base": "main",     # Default base branch
-                    "title": f"PR for {repo_name} on {datetime.now().strftime('%Y-%m-%d')}",
-                    "body": ""
-                }
-            else:
-                for param, value in zip(p["params"], match.groups()):
-                    if value:
-                        result["params"][param] = value
-                # Set defaults for optional params
-                if p["intent"] == "create_pr" and "title" not in result["params"]:
-                    result["params"]["title"] = f"PR from {result['params']['head']} to {result['params']['base']}"
-                    result["params"]["body"] = result["params"].get("body", "")
-                if p["intent"] == "merge_pr" and "message" not in result["params"]:
-                    result["params"]["message"] = "Merged via MCP"
-                if p["intent"] == "create_issue" and "title" not in result["params"]:
-                    result["params"]["title"] = f"Issue created on {datetime.now().strftime('%Y-%m-%d')}"
-                    result["params"]["body"] = result["params"].get("body", "")
-                if p["intent"] == "view_file" and "branch" not in result["params"]:
-                    result["params"]["branch"] = "main"
-                if p["intent"] == "list_items" and "state" not in result["params"]:
-                    result["params"]["state"] = "open"
-            return result
-    
-    return {"error": f"Could not understand command: {prompt}"}
+    result = match_intent(prompt, repo_name, full=False)
+    if result is None:
+        return {"error": f"Could not understand command: {prompt}"}
+    return result
 
 def interpret_command(command, repo_name):
     """
-    Parse natural language command using the mock LLM or OpenRouter LLM.
-    Returns structured JSON with intent and parameters.
+    Parse natural language command, cheapest tier first:
+    compiled patterns (confident full matches only), the intent cache,
+    the OpenRouter LLM, then the lenient mock LLM as a last resort.
+    Returns structured JSON with intent and parameters, or {"actions": [...]}
+    for compound commands such as "create issue ... and list open issues".
     """
+    started = time.perf_counter()
+    structured = match_intent(command, repo_name) or match_plan(command, repo_name)
+    if structured is not None:
+        resolver_stats.record("local", started)
+        return structured
+
+    cached = intent_cache.get(command, repo_name)
+    if cached is not None:
+        resolver_stats.record("cache", started)
+        return cached
     try:
         from llm_agent import ask_llm
         response = ask_llm(command, repo_name)
         # Expect response to be a JSON string with intent and params
         import json
         structured = json.loads(response)
-        return structured
+        tier = "llm"
     except Exception as e:
         # Fallback to mock LLM if OpenRouter fails
-        return mock_llm(command, repo_name)
+        structured = mock_llm(command, repo_name)
+        tier = "fallback"
+    if "error" in structured:
+        tier = "unresolved"
+    elif tier == "llm":
+        # Fallback guesses are not cached, so the command goes back to the LLM once it recovers
+        intent_cache.put(command, repo_name, structured)
+    resolver_stats.record(tier, started)
+    return structured
+
+def plan_actions(structured):
+    """
+    Return the steps of a parsed command as a list of {intent, params, depends_on}.
+    A single intent becomes a one-step plan; dependencies that don't point at an
+    earlier step are dropped so a plan can never deadlock.
+    """
+    if "actions" not in structured:
+        return [{"intent": structured.get("intent"), "params": structured.get("params", {}), "depends_on": []}]
+    steps = structured["actions"]
+    actions = [{"intent": a.get("intent"), "params": a.get("params", {})} for a in steps]
+    if any("depends_on" not in a for a in steps):
+        # No explicit dependencies: order writes, and reads after the writes before them
+        return link_actions(actions, [False] * len(actions))
+    for i, (action, step) in enumerate(zip(actions, steps)):
+        action["depends_on"] = sorted({d for d in step["depends_on"] if isinstance(d, int) and 0 <= d < i})
+    return actions
+
+def _timed_action(action, repo_name):
+    started = time.perf_counter()
+    result = _execute_action(action, repo_name)
+    if not isinstance(result, dict):
+        result = {"error": f"Action returned no result: {result!r}"}
+    return result, round((time.perf_counter() - started) * 1000, 1)
+
+def execute_plan(actions, repo_name):
+    """
+    Run a multi-step plan: steps whose dependencies are done run concurrently,
+    dependent steps wait, and a step is skipped if anything it depends on failed.
+    Returns one combined result with per-step timing.
+    """
+    started = time.perf_counter()
+    results = [None] * len(actions)
+    pending = {i: set(action["depends_on"]) for i, action in enumerate(actions)}
+    running = {}
+    with ThreadPoolExecutor(max_workers=PLAN_WORKERS) as pool:
+        while pending or running:
+            ready = [i for i, deps in pending.items() if all(results[d] is not None for d in deps)]
+            for i in ready:
+                deps = pending.pop(i)
+                failed = [d for d in sorted(deps) if "error" in results[d][0]]
+                if failed:
+                    results[i] = ({"error": f"Skipped: step {failed[0] + 1} failed"}, 0.0)
+                    continue
+                # Copy the context so the GitHub lane and credential carry into the worker
+                future = pool.submit(contextvars.copy_context().run, _timed_action, actions[i], repo_name)
+                running[future] = i
+            if not running:
+                if ready:
+                    continue
+                break
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                results[running.pop(future)] = future.result()
+
+    steps = []
+    for i, (action, (result, elapsed_ms)) in enumerate(zip(actions, results), 1):
+        step = {"step": i, "intent": action["intent"], "params": action["params"],
+                "depends_on": [d + 1 for d in action["depends_on"]], "elapsed_ms": elapsed_ms}
+        step.update(result)
+        steps.append(step)
+    succeeded = sum(1 for step in steps if "error" not in step)
+    combined = {
+        "message": f"Ran {succeeded}/{len(steps)} actions",
+        "data": steps,
+        "elapsed_ms": round((time.perf_counter() - started) * 1000, 1),
+    }
+    if succeeded == 0:
+        combined["error"] = "; ".join(f"step {step['step']}: {step['error']}" for step in steps)
+    return combined
 
 def execute_actions(structured, repo_name):
     """
     Execute GitHub actions based on parsed intent and parameters.
+    Compound commands ({"actions": [...]}) run as a plan via execute_plan.
     Returns a dictionary with 'message' and optional 'data' or 'error'.
     """
+    if "actions" in structured:
+        return execute_plan(plan_actions(structured), repo_name)
+    return _execute_action(structured, repo_name)
+
+def _execute_action(structured, repo_name):
+    """Execute a single intent"""
     intent = structured.get("intent")
     params = structured.get("params", {})
     
     try:
         if intent == "create_pr":
-            # Validate branches exist
-            branches = list_branches(repo_name)
-            if isinstance(branches, str):
-                return {"error": branches}
-            if params["head"] not in branches:
-                return {"error": f"Head branch '{params['head']}' does not exist. Available branches: {', '.join(branches)}"}
-            if params["base"] not in branches:
-                return {"error": f"Base branch '{params['base']}' does not exist. Available branches: {', '.join(branches)}"}
+            # Validate branches exist: one ref lookup each (at most two requests)
+            for role in ("head", "base"):
+                branch = params[role]
+                # "owner:branch" heads live in a fork; GitHub validates those itself
+                if ":" not in branch and not branch_exists(repo_name, branch):
+                    return {"error": f"{role.capitalize()} branch '{branch}' does not exist in {repo_name}."}
             result = create_pull_request(
                 repo_name,
                 params["base"],
@@ -197,12 +215,15 @@ def execute_actions(structured, repo_name):
             elif item_type == "commits":
                 data = list_recent_commits(repo_name)
                 return {"message": "Listed recent commits", "data": data}
+            else:
+                return {"error": f"Unknown item type: {item_type}"}
         
         elif intent == "view_file":
             content = get_file_content(
                 repo_name,
                 params["file_path"],
-                branch=params["branch"]
+                branch=params["branch"],
+                max_bytes=PREVIEW_BYTES
             )
             if isinstance(content, str):
                 return {"message": "File content retrieved", "data": {"content": content[:1000]}}
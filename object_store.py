@@ -0,0 +1,200 @@
+# object_store.py
+import json
+import mmap
+import os
+import tempfile
+import threading
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows: eviction is still correct, just not serialized across processes
+    fcntl = None
+
+CACHE_DIR = os.getenv("MCP_CACHE_DIR", ".mcp_cache")
+OBJECT_CACHE_MAX_MB = int(os.getenv("OBJECT_CACHE_MAX_MB", "512"))
+# Larger objects are streamed but never stored
+OBJECT_CACHE_MAX_OBJECT_MB = int(os.getenv("OBJECT_CACHE_MAX_OBJECT_MB", "64"))
+
+
+class ObjectStore:
+    """
+    Content-addressed store for immutable git data (blobs, trees, commits), keyed by
+    (kind, SHA) under root/kind/ab/abcdef....
+
+    Writes go to a temp file in the same directory and are renamed into place, so
+    readers in any process see a complete object or none. Reads are served through
+    mmap. A file's mtime is its last use; once the store grows past max_bytes the
+    least recently used objects are deleted, under a lock file shared by all processes.
+    """
+
+    def __init__(self, root=None, max_bytes=None, max_object_bytes=None):
+        self.root = root or os.path.join(CACHE_DIR, "objects")
+        self.max_bytes = max_bytes if max_bytes is not None else OBJECT_CACHE_MAX_MB * 1024 * 1024
+        self.max_object_bytes = (max_object_bytes if max_object_bytes is not None
+                                 else OBJECT_CACHE_MAX_OBJECT_MB * 1024 * 1024)
+        self._lock = threading.Lock()
+        self._size = None  # bytes on disk as last measured plus our own writes
+        self.hits = 0
+        self.misses = 0
+        self.evicted = 0
+
+    def _path(self, kind, sha):
+        return os.path.join(self.root, kind, sha[:2], sha)
+
+    def _count(self, hit):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    @contextmanager
+    def mapped(self, kind, sha):
+        """
+        Yield a read-only mmap of an object (b"" for empty objects), or None on a miss.
+        Slicing the map only pages in the bytes that are used.
+        """
+        try:
+            f = open(self._path(kind, sha), "rb")
+        except OSError:
+            self._count(False)
+            yield None
+            return
+        with f:
+            self._count(True)
+            try:
+                os.utime(f.fileno())  # mark as recently used
+            except OSError:
+                pass
+            size = os.fstat(f.fileno()).st_size
+            if size == 0:
+                yield b""
+                return
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            try:
+                yield mm
+            finally:
+                mm.close()
+
+    def get(self, kind, sha):
+        """The object's bytes, or None"""
+        with self.mapped(kind, sha) as mm:
+            return None if mm is None else bytes(mm)
+
+    def get_json(self, kind, sha):
+        data = self.get(kind, sha)
+        return None if data is None else json.loads(data)
+
+    def contains(self, kind, sha):
+        return os.path.exists(self._path(kind, sha))
+
+    @contextmanager
+    def writer(self, kind, sha):
+        """
+        Yield a binary file to write an object into; it is published atomically when
+        the block exits cleanly and discarded otherwise (or if it exceeds max_object_bytes).
+        """
+        path = self._path(kind, sha)
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=directory, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                yield f
+                size = f.tell()
+            if size <= self.max_object_bytes:
+                os.replace(tmp, path)
+                self._grow(size)
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+
+    def put(self, kind, sha, data):
+        """Store bytes under (kind, sha); a no-op if the object is already present"""
+        if len(data) > self.max_object_bytes or self.contains(kind, sha):
+            return
+        try:
+            with self.writer(kind, sha) as f:
+                f.write(data)
+        except OSError:
+            pass  # a full or read-only disk only costs us the cache
+
+    def put_json(self, kind, sha, obj):
+        self.put(kind, sha, json.dumps(obj).encode())
+
+    def _objects(self):
+        for dirpath, _, files in os.walk(self.root):
+            for name in files:
+                if name.startswith(".tmp-") or name == ".lock":
+                    continue
+                path = os.path.join(dirpath, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                yield path, st.st_size, st.st_mtime
+
+    def _grow(self, size):
+        with self._lock:
+            if self._size is None:
+                self._size = sum(s for _, s, _ in self._objects())
+            else:
+                self._size += size
+            over = self._size > self.max_bytes
+        if over:
+            self.evict()
+
+    def evict(self, target=0.9):
+        """Delete least recently used objects until the store is below target * max_bytes"""
+        os.makedirs(self.root, exist_ok=True)
+        with open(os.path.join(self.root, ".lock"), "w") as lock:
+            if fcntl:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            objects = sorted(self._objects(), key=lambda o: o[2])
+            total = sum(size for _, size, _ in objects)
+            for path, size, _ in objects:
+                if total <= self.max_bytes * target:
+                    break
+                try:
+                    os.remove(path)  # open maps in other processes stay valid on POSIX
+                except OSError:
+                    continue
+                total -= size
+                self.evicted += 1
+        with self._lock:
+            self._size = total
+
+    def clear(self):
+        for path, _, _ in list(self._objects()):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        with self._lock:
+            self._size = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+                "evicted": self.evicted,
+                "bytes": self._size,
+            }
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    """The process-wide object store under MCP_CACHE_DIR"""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = ObjectStore()
+    return _store
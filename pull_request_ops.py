@@ -1,24 +1,22 @@
 # pull_request_ops.py
-from github import Github
-from dotenv import load_dotenv
-import os
-
-load_dotenv()
-token = os.getenv("GITHUB_TOKEN")
-g = Github(token)
+from github_session import get_repo, scheduled, note_github_error
+from repo_counts import forget_counts
 
+@scheduled("write")
 def create_pull_request(repo_name, base_branch, head_branch, title, body=""):
     """
     Create a pull request from head_branch into base_branch
     """
     try:
-        repo = g.get_repo(repo_name)
+        repo = get_repo(repo_name)
         pr = repo.create_pull(
             title=title,
             body=body,
             head=head_branch,
             base=base_branch
         )
+        forget_counts(repo_name)
         return f"✅ Pull request created: {pr.html_url}"
     except Exception as e:
+        note_github_error(e)
         return f"[ERROR] Could not create PR: {str(e)}"
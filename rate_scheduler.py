@@ -0,0 +1,172 @@
+# rate_scheduler.py
+import heapq
+import itertools
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+# Lower value = served first
+LANES = {"interactive": 0, "write": 1, "background": 2}
+
+_current_lane = ContextVar("github_lane", default="interactive")
+
+
+def is_rate_limited(headers, status):
+    """Whether a 403 / 429 is a rate-limit rejection (worth waiting for) rather than missing permissions"""
+    if status not in (403, 429):
+        return False
+    return headers.get("Retry-After") is not None or (
+        headers.get("X-RateLimit-Remaining") == "0" and bool(headers.get("X-RateLimit-Reset")))
+
+
+def current_lane():
+    return _current_lane.get()
+
+
+def read_lane():
+    """Lane for a read made on behalf of the current caller (reads never queue behind writes)"""
+    name = _current_lane.get()
+    return "interactive" if name == "write" else name
+
+
+@contextmanager
+def lane(name):
+    """Run the enclosed GitHub calls in the given priority lane"""
+    if name not in LANES:
+        raise ValueError(f"Unknown lane: {name}")
+    token = _current_lane.set(name)
+    try:
+        yield
+    finally:
+        _current_lane.reset(token)
+
+
+class RateScheduler:
+    """
+    Admission control for GitHub API calls.
+
+    The remaining core budget is a token bucket synced from X-RateLimit-* headers
+    and refilled at the reset time. Callers queue by lane priority; background
+    work leaves a reserve for interactive reads, writes are spaced to respect the
+    secondary limits, and a 403/429 rate-limit response pauses every lane until
+    Retry-After / reset instead of failing.
+    """
+
+    def __init__(self, limit=5000, background_reserve=0.1, write_interval=1.0):
+        self._cond = threading.Condition()
+        self._queue = []
+        self._seq = itertools.count()
+        self.limit = limit
+        self.remaining = limit
+        self.reset_at = time.time() + 3600
+        self.background_reserve = background_reserve
+        self.write_interval = write_interval
+        self.paused_until = 0.0
+        self._last_write = 0.0
+        self.granted = {name: 0 for name in LANES}
+        self.waits = 0
+        self.wait_seconds = 0.0
+        self.throttled = 0
+
+    def _refill(self, now):
+        if now >= self.reset_at:
+            self.remaining = self.limit
+            self.reset_at = now + 3600
+
+    def _delay(self, ticket, lane_name, now):
+        """Seconds to wait before ticket may run; None means wait for the queue to move"""
+        if now < self.paused_until:
+            return self.paused_until - now
+        if self._queue[0] != ticket:
+            return None
+        reserve = int(self.limit * self.background_reserve) if lane_name == "background" else 0
+        if self.remaining <= reserve:
+            return max(self.reset_at - now, 0.05)
+        if lane_name == "write":
+            gap = self._last_write + self.write_interval - now
+            if gap > 0:
+                return gap
+        return 0
+
+    def acquire(self, lane_name="interactive"):
+        """Block until the lane may send one request, then spend one token"""
+        ticket = (LANES[lane_name], next(self._seq))
+        started = time.monotonic()
+        waited = False
+        with self._cond:
+            heapq.heappush(self._queue, ticket)
+            try:
+                while True:
+                    now = time.time()
+                    self._refill(now)
+                    delay = self._delay(ticket, lane_name, now)
+                    if delay == 0:
+                        break
+                    waited = True
+                    self._cond.wait(delay)
+            finally:
+                self._queue.remove(ticket)
+                heapq.heapify(self._queue)
+                self._cond.notify_all()
+            self.remaining -= 1
+            self.granted[lane_name] += 1
+            if lane_name == "write":
+                self._last_write = time.time()
+            if waited:
+                self.waits += 1
+                self.wait_seconds += time.monotonic() - started
+
+    def update(self, remaining=None, limit=None, reset_at=None):
+        """Sync the bucket with values reported by the API"""
+        with self._cond:
+            if limit is not None and limit > 0:
+                self.limit = limit
+            if remaining is not None and remaining >= 0:
+                self.remaining = remaining
+            if reset_at:
+                self.reset_at = reset_at
+            self._cond.notify_all()
+
+    def observe(self, headers, status=200):
+        """
+        Feed response headers back into the scheduler.
+        Returns True if the response was a rate-limit rejection that should be retried.
+        """
+        resource = headers.get("X-RateLimit-Resource", "core")
+        remaining = headers.get("X-RateLimit-Remaining")
+        reset = headers.get("X-RateLimit-Reset")
+        if resource == "core" and remaining is not None:
+            self.update(int(remaining), int(headers.get("X-RateLimit-Limit", self.limit)), float(reset) if reset else None)
+
+        if not is_rate_limited(headers, status):
+            return False
+        retry_after = headers.get("Retry-After")
+        if retry_after is not None:
+            pause = time.time() + float(retry_after)
+        else:
+            pause = float(reset)
+        with self._cond:
+            self.throttled += 1
+            self.paused_until = max(self.paused_until, pause)
+            self._cond.notify_all()
+        return True
+
+    def stats(self):
+        with self._cond:
+            now = time.time()
+            depth = {name: 0 for name in LANES}
+            by_priority = {v: k for k, v in LANES.items()}
+            for priority, _ in self._queue:
+                depth[by_priority[priority]] += 1
+            return {
+                "remaining": self.remaining,
+                "limit": self.limit,
+                "reset_in": max(int(self.reset_at - now), 0),
+                "paused_for": max(round(self.paused_until - now, 1), 0),
+                "queue_depth": depth,
+                "granted": dict(self.granted),
+                "waits": self.waits,
+                "wait_seconds": round(self.wait_seconds, 2),
+                "throttled": self.throttled,
+            }
@@ -0,0 +1,52 @@
+# repo_counts.py
+import os
+from urllib.parse import urlparse, parse_qs
+from github_session import get_page, get_json
+from ttl_cache import TTLCache
+
+COUNT_TTL = int(os.getenv("GITHUB_COUNT_TTL", "60"))
+
+_counts = TTLCache(ttl=COUNT_TTL, max_entries=512)
+
+
+def _count_listing(path, params=None):
+    """
+    Count the items of a REST listing from a single per_page=1 request:
+    the page number of the Link rel="last" URL equals the total.
+    """
+    params = dict(params or {}, per_page=1)
+    body, links = get_page(path, params)
+    last = links.get("last", {}).get("url")
+    if not last:
+        return len(body)
+    return int(parse_qs(urlparse(last).query)["page"][0])
+
+
+def count_open_prs(repo_name):
+    """Number of open pull requests (one request, no iteration)"""
+    return _count_listing(f"/repos/{repo_name}/pulls", {"state": "open"})
+
+
+def count_open_issues(repo_name):
+    """Number of open issues excluding pull requests, via the search total_count"""
+    result = get_json("/search/issues", {"q": f"repo:{repo_name} is:issue is:open", "per_page": 1})
+    return result["total_count"]
+
+
+def count_recent_commits(repo_name, limit=5):
+    """Number of commits on the default branch, capped at limit"""
+    return len(get_json(f"/repos/{repo_name}/commits", {"per_page": limit}))
+
+
+def get_repo_counts(repo_name):
+    """Open issue / PR and recent commit counts, cached for GITHUB_COUNT_TTL seconds"""
+    return _counts.get_or_load(repo_name.lower(), lambda: {
+        "open_issues": count_open_issues(repo_name),
+        "open_prs": count_open_prs(repo_name),
+        "recent_commits": count_recent_commits(repo_name),
+    })
+
+
+def forget_counts(repo_name):
+    """Drop cached counts after an issue or PR was created, merged or closed"""
+    _counts.invalidate(repo_name.lower())
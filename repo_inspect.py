@@ -1,81 +1,251 @@
 # repo_inspect.py
-from github import Github
-from dotenv import load_dotenv
 import os
+import posixpath
+import re
+from urllib.parse import quote
+from github_session import get_json, get_page, paginate, parse_timestamp
+from object_store import get_store
+from ttl_cache import TTLCache
+from tree_index import load_tree_index, resolve_commit
 
-load_dotenv()
-token = os.getenv("GITHUB_TOKEN")
-g = Github(token)
+BRANCH_TTL = int(os.getenv("GITHUB_BRANCH_TTL", "300"))
+# Per-file patches are cut at this size when requested
+PATCH_MAX_BYTES = int(os.getenv("GITHUB_PATCH_MAX_BYTES", "16384"))
+# The compare API lists at most this many files for a whole comparison
+COMPARE_FILE_LIMIT = 300
+# ...and at most this many commits
+COMPARE_COMMIT_LIMIT = 250
+
+_TREE_TYPES = {"blob": "file", "tree": "dir", "commit": "submodule"}
+_FULL_SHA = re.compile(r"^[0-9a-f]{40}$")
+_RANGE = re.compile(r"^(\S+?)\.\.\.(\S+)$")
+
+# Branch names known to exist, per repo: filled by listings and single-ref lookups
+_known_branches = TTLCache(ttl=BRANCH_TTL, max_entries=512)
+
+def _remember_branches(repo_name, names, replace=False):
+    key = repo_name.lower()
+    known = set() if replace else _known_branches.get(key, set())
+    # Copy on write so readers never see a set being mutated
+    _known_branches.set(key, known | set(names))
+
+def forget_branches(repo_name):
+    """Drop the cached branch names after branches were created, deleted or merged away"""
+    _known_branches.invalidate(repo_name.lower())
 
 def list_branches(repo_name):
     """Return a list of all branches in the given repository"""
     try:
-        repo = g.get_repo(repo_name)
-        branches = repo.get_branches()
-        return [branch.name for branch in branches]
+        branches = paginate(f"/repos/{repo_name}/branches")
+        names = [branch["name"] for branch in branches]
+        _remember_branches(repo_name, names, replace=True)
+        return names
     except Exception as e:
         return f"[ERROR] Failed to fetch branches: {str(e)}"
 
+def branch_exists(repo_name, branch):
+    """
+    Check a single branch with one direct ref lookup instead of listing every branch.
+    Branches already seen are answered from the cache without a request.
+    Raises GithubException for errors other than "not found".
+    """
+    if branch in _known_branches.get(repo_name.lower(), set()):
+        return True
+    try:
+        get_json(f"/repos/{repo_name}/git/ref/heads/{quote(branch, safe='/')}")
+    except Exception as e:
+        if getattr(e, "status", None) == 404:
+            return False
+        raise
+    _remember_branches(repo_name, [branch])
+    return True
+
 def list_recent_commits(repo_name):
     """List recent commits in a repository"""
     try:
-        repo = g.get_repo(repo_name)
-        commits = repo.get_commits()[:7]  # Limit to 7 recent commits
+        commits = get_json(f"/repos/{repo_name}/commits", {"per_page": 7})  # Limit to 7 recent commits
         commit_list = []
         for commit in commits:
             commit_list.append({
-                "sha": commit.sha,
-                "author": commit.commit.author.name,
-                "date": commit.commit.author.date.strftime('%Y-%m-%d %H:%M'),
-                "message": commit.commit.message
+                "sha": commit["sha"],
+                "author": commit["commit"]["author"]["name"],
+                "date": parse_timestamp(commit["commit"]["author"]["date"]).strftime('%Y-%m-%d %H:%M'),
+                "message": commit["commit"]["message"]
             })
         return commit_list
     except Exception as e:
         return f"[ERROR] Failed to list commits: {str(e)}"
 
 
-def get_commit_diff(repo_name, commit_sha):
-    """Get file changes and stats for a specific commit"""
+def _file_change(f, patches):
+    change = {
+        "filename": f["filename"],
+        "status": f.get("status"),
+        "additions": f.get("additions"),
+        "deletions": f.get("deletions"),
+        "changes": f.get("changes")
+    }
+    if f.get("previous_filename"):
+        change["previous_filename"] = f["previous_filename"]
+    if patches:
+        # Absent for binary files and diffs too large for GitHub to render
+        patch = (f.get("patch") or "").encode()
+        change["patch"] = patch[:PATCH_MAX_BYTES].decode(errors="ignore")
+        change["patch_truncated"] = len(patch) > PATCH_MAX_BYTES
+    return change
+
+
+def _pages(path, key):
+    """A commit or comparison plus the items of `key` from every further page of its Link header"""
+    body, links = get_page(path)
+    items = list(body.get(key, []))
+    url = links.get("next", {}).get("url")
+    while url:
+        page, links = get_page(url)
+        items.extend(page.get(key, []))
+        url = links.get("next", {}).get("url")
+    return body, items
+
+
+def _stats(files):
+    additions = sum(f["additions"] or 0 for f in files)
+    deletions = sum(f["deletions"] or 0 for f in files)
+    return {"additions": additions, "deletions": deletions, "total": additions + deletions}
+
+
+def _tree_changes(repo_name, base_sha, head_sha, known):
+    """
+    Files that differ between two commits' trees, for comparisons past the compare API's
+    file limit. No line counts, and renames show up as a removal plus an addition.
+    """
+    old = {e["path"]: e["sha"] for e in load_tree_index(repo_name, base_sha).walk() if e["type"] == "blob"}
+    new = {e["path"]: e["sha"] for e in load_tree_index(repo_name, head_sha).walk() if e["type"] == "blob"}
+    for path in sorted(old.keys() | new.keys()):
+        if path in known or old.get(path) == new.get(path):
+            continue
+        status = "added" if path not in old else "removed" if path not in new else "modified"
+        yield {"filename": path, "status": status, "additions": None, "deletions": None, "changes": None}
+
+
+def _commit_summary(repo_name, sha, patches):
+    # One request; commits with more than 300 files continue on further pages (up to 3000 files)
+    body, files = _pages(f"/repos/{repo_name}/commits/{quote(sha, safe='')}", "files")
+    commit, author = body["commit"], body.get("author")
+    summary = {
+        "sha": body["sha"],
+        "message": commit["message"],
+        "author": commit["author"]["name"],
+        "email": commit["author"]["email"],
+        "github_user": author["login"] if author else "N/A",
+        "github_url": author["html_url"] if author else "N/A",
+        "date": parse_timestamp(commit["author"]["date"]).strftime('%Y-%m-%d %H:%M'),
+        "stats": {
+                    "additions": body["stats"]["additions"],
+                    "deletions": body["stats"]["deletions"],
+                    "total": body["stats"]["total"]
+                },
+        "files_changed": [_file_change(f, patches) for f in files]
+    }
+    return body["sha"], summary
+
+
+def _compare_summary(repo_name, base, head, patches):
+    # Files come with the first page only; further pages just continue the commit list
+    body, commits = _pages(f"/repos/{repo_name}/compare/{quote(base, safe='')}...{quote(head, safe='')}", "commits")
+    files = [_file_change(f, patches) for f in body.get("files", [])]
+    complete = len(files) < COMPARE_FILE_LIMIT
+    if not complete:
+        known = {f["filename"] for f in files}
+        # Not the last listed commit: the commit list may stop short of head
+        head_sha = resolve_commit(repo_name, head)
+        files.extend(_tree_changes(repo_name, body["merge_base_commit"]["sha"], head_sha, known))
+    return {
+        "base": base,
+        "head": head,
+        "merge_base": body["merge_base_commit"]["sha"],
+        "status": body["status"],
+        "ahead_by": body["ahead_by"],
+        "behind_by": body["behind_by"],
+        "total_commits": body["total_commits"],
+        # The commit list stops at COMPARE_COMMIT_LIMIT; the files and stats still cover the whole range
+        "truncated": len(commits) < body["total_commits"],
+        "commits": [
+            {
+                "sha": c["sha"],
+                "author": c["commit"]["author"]["name"],
+                "date": parse_timestamp(c["commit"]["author"]["date"]).strftime('%Y-%m-%d %H:%M'),
+                "message": c["commit"]["message"]
+            } for c in commits
+        ],
+        # Line counts only cover the files the compare API listed
+        "stats": _stats(files),
+        "stats_complete": complete,
+        "files_changed": files
+    }
+
+
+def get_commit_diff(repo_name, commit_sha, patches=False):
+    """
+    Get file changes and stats for a commit, or for a 'base...head' range.
+    patches=True adds each file's diff, cut at GITHUB_PATCH_MAX_BYTES.
+    """
     try:
-        repo = g.get_repo(repo_name)
-        commit = repo.get_commit(sha=commit_sha)
-        files = commit.files
-        summary = {
-            "message": commit.commit.message,
-            "author": commit.commit.author.name,
-            "email": commit.commit.author.email,
-            "github_user": commit.author.login if commit.author else "N/A",
-            "github_url": commit.author.html_url if commit.author else "N/A",
-            "date": commit.commit.author.date.strftime('%Y-%m-%d %H:%M'),
-            "stats": {
-                        "additions": commit.stats.additions,
-                        "deletions": commit.stats.deletions,
-                        "total": commit.stats.total
-                    },
-            "files_changed": []
-        }
-        for f in files:
-            summary["files_changed"].append({
-                "filename": f.filename,
-                "additions": f.additions,
-                "deletions": f.deletions,
-                "changes": f.changes
-            })
+        if ".." in commit_sha and not _RANGE.match(commit_sha.strip()):
+            # base..head compares the endpoints directly, base...head from their merge base
+            return "[ERROR] Failed to get commit diff: only base...head (three-dot) ranges are supported"
+        kind = "commit-patches" if patches else "commit-summary"
+        range_match = _RANGE.match(commit_sha.strip())
+        if range_match:
+            base, head = range_match.groups()
+            key = f"{base}...{head}" if _FULL_SHA.match(base) and _FULL_SHA.match(head) else None
+        else:
+            key = commit_sha if _FULL_SHA.match(commit_sha) else None
+        # A commit (or a range between two commits) never changes; full SHAs are answered from the object store
+        if key:
+            cached = get_store().get_json(kind, key)
+            if cached is not None:
+                return cached
+        if range_match:
+            summary = _compare_summary(repo_name, base, head, patches)
+        else:
+            key, summary = _commit_summary(repo_name, commit_sha, patches)
+        if key:
+            get_store().put_json(kind, key, summary)
         return summary
     except Exception as e:
         return f"[ERROR] Failed to get commit diff: {str(e)}"
+
+
 def get_file_tree(repo_name, branch="main", path=""):
     """Return the file/folder tree of a repo at a given branch and path"""
     try:
-        repo = g.get_repo(repo_name)
-        contents = repo.get_contents(path, ref=branch)
-        file_list = []
-        for content in contents:
-            file_list.append({
-                "name": content.name,
-                "path": content.path,
-                "type": content.type  # 'file' or 'dir'
-            })
-        return file_list
+        index = load_tree_index(repo_name, branch)
+        if path and index.get(path) is None:
+            return f"[ERROR] Could not fetch file tree: '{path}' not found on {branch}"
+        return [
+            {
+                "name": posixpath.basename(entry["path"]),
+                "path": entry["path"],
+                "type": _TREE_TYPES.get(entry["type"], entry["type"])  # 'file' or 'dir'
+            } for entry in index.list_dir(path)
+        ]
     except Exception as e:
         return f"[ERROR] Could not fetch file tree: {str(e)}"
+
+def find_files(repo_name, branch="main", pattern=None, extension=None, prefix=""):
+    """
+    Search every path of a branch from its cached tree index.
+    pattern is a shell glob ('src/*.py'), extension a suffix ('.md'), prefix a directory.
+    """
+    try:
+        index = load_tree_index(repo_name, branch)
+        if pattern:
+            entries = index.glob(pattern)
+        elif extension:
+            under = prefix.strip("/") + "/" if prefix.strip("/") else ""
+            entries = [e for e in index.by_extension(extension) if e["path"].startswith(under)]
+        else:
+            entries = index.walk(prefix)
+        return [e["path"] for e in entries if e["type"] == "blob"]
+    except Exception as e:
+        return f"[ERROR] Could not search files: {str(e)}"
@@ -0,0 +1,83 @@
+# tests/test_circuit_breaker.py
+import pytest
+
+import circuit_breaker
+from circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(circuit_breaker.time, "monotonic", lambda: now[0])
+    return now
+
+
+def test_opens_after_consecutive_failures(clock):
+    breaker = CircuitBreaker("test", failure_threshold=3, reset_timeout=10)
+    for _ in range(2):
+        assert breaker.allow()
+        breaker.record_failure()
+    assert breaker.state == CLOSED
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    assert not breaker.allow()
+    assert breaker.stats()["short_circuited"] == 1
+    assert breaker.retry_in() == 10
+
+
+def test_success_resets_failure_count(clock):
+    breaker = CircuitBreaker("test", failure_threshold=2)
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    assert breaker.state == CLOSED
+
+
+def test_half_open_lets_one_probe_through(clock):
+    breaker = CircuitBreaker("test", failure_threshold=1, reset_timeout=10)
+    breaker.record_failure()
+    clock[0] += 10
+    assert breaker.allow()
+    assert breaker.state == HALF_OPEN
+    assert not breaker.allow()
+
+
+def test_probe_success_closes(clock):
+    breaker = CircuitBreaker("test", failure_threshold=1, reset_timeout=10)
+    breaker.record_failure()
+    clock[0] += 10
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CLOSED
+    assert breaker.allow() and breaker.allow()
+
+
+def test_probe_failure_reopens(clock):
+    breaker = CircuitBreaker("test", failure_threshold=1, reset_timeout=10)
+    breaker.record_failure()
+    clock[0] += 10
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    assert breaker.stats()["trips"] == 2
+    clock[0] += 5
+    assert not breaker.allow()
+    assert breaker.retry_in() == 5
+
+
+def test_release_frees_the_probe(clock):
+    breaker = CircuitBreaker("test", failure_threshold=1, reset_timeout=10)
+    breaker.record_failure()
+    clock[0] += 10
+    assert breaker.allow()
+    breaker.release()
+    assert breaker.state == HALF_OPEN
+    assert breaker.allow()
+
+
+def test_describe_breakers(clock, monkeypatch):
+    monkeypatch.setattr(circuit_breaker, "_registry", {})
+    circuit_breaker.get_breaker("llm", failure_threshold=1, reset_timeout=12).record_failure()
+    circuit_breaker.get_breaker("github")
+    assert circuit_breaker.get_breaker("github") is circuit_breaker.get_breaker("github")
+    assert circuit_breaker.describe_breakers() == "github: closed, llm: open (probe in 12.0s)"
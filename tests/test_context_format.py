@@ -0,0 +1,61 @@
+# tests/test_context_format.py
+import json
+
+import pytest
+
+from context_format import (
+    is_indexed, list_sections, msgpack, read_context, read_section, write_context,
+)
+
+MCP = {
+    "@context": "https://modelcontextprotocol.io/context/v1",
+    "sync": {"events_etag": "W/\"abc\""},
+    "modelcontext": {
+        "repository": {"name": "octo/demo", "stars": 3, "topics": ["ünïcode", "cli"]},
+        "open_issues": [{"number": 1, "title": "Bug", "labels": []}],
+        "issue_comments": [],
+    },
+}
+
+CODECS = ["json", pytest.param("msgpack", marks=pytest.mark.skipif(msgpack is None, reason="msgpack not installed"))]
+
+
+@pytest.mark.parametrize("codec", CODECS)
+@pytest.mark.parametrize("compress", [False, True])
+def test_round_trip(tmp_path, codec, compress):
+    path = tmp_path / "mcp.mcpx"
+    write_context(MCP, str(path), codec=codec, compress=compress)
+    assert is_indexed(str(path))
+    assert read_context(str(path)) == MCP
+
+
+def test_read_selected_sections(tmp_path):
+    path = str(tmp_path / "mcp.mcpx")
+    write_context(MCP, path)
+    partial = read_context(path, sections=["repository", "missing"])
+    assert partial["modelcontext"] == {"repository": MCP["modelcontext"]["repository"]}
+    assert partial["sync"] == MCP["sync"]
+    assert list_sections(path) == list(MCP["modelcontext"])
+
+
+def test_read_section(tmp_path):
+    path = str(tmp_path / "mcp.mcpx")
+    write_context(MCP, path, compress=True)
+    assert read_section(path, "open_issues") == MCP["modelcontext"]["open_issues"]
+    assert read_section(path, "missing", default=[]) == []
+
+
+def test_plain_json_is_still_read(tmp_path):
+    path = tmp_path / "mcp.json"
+    path.write_text(json.dumps(MCP))
+    assert not is_indexed(str(path))
+    assert read_context(str(path)) == MCP
+    assert read_section(str(path), "repository") == MCP["modelcontext"]["repository"]
+
+
+def test_rewrite_replaces_atomically(tmp_path):
+    path = tmp_path / "mcp.mcpx"
+    write_context(MCP, str(path))
+    write_context({"modelcontext": {"repository": {}}}, str(path))
+    assert read_context(str(path)) == {"modelcontext": {"repository": {}}}
+    assert [p.name for p in tmp_path.iterdir()] == ["mcp.mcpx"]
@@ -0,0 +1,67 @@
+# tests/test_intent_resolver.py
+import pytest
+
+from intent_resolver import match_intent, match_plan, split_command
+
+REPO = "octo/demo"
+
+
+@pytest.mark.parametrize("command, intent, params", [
+    ("create pr from dev to main with title 'Fix login' and description 'Closes #4'", "create_pr",
+     {"head": "dev", "base": "main", "title": "Fix login", "body": "Closes #4"}),
+    ("merge pull request #12", "merge_pr", {"pr_number": "12", "message": "Merged via MCP"}),
+    ("comment on PR 7 with 'Looks good'", "comment_pr", {"pr_number": "7", "comment": "Looks good"}),
+    ("comment on issue #3 with \"On it\"", "comment_issue", {"issue_number": "3", "comment": "On it"}),
+    ("List Closed Issues", "list_items", {"state": "closed", "item_type": "issues"}),
+    ("show branches", "list_items", {"state": "open", "item_type": "branches"}),
+    ("view file 'src/App.py'", "view_file", {"file_path": "src/App.py", "branch": "main"}),
+    ("view commit abc123", "view_commit", {"commit_sha": "abc123"}),
+    ("view commit main...feature", "view_commit", {"commit_sha": "main...feature"}),
+    ("list comments on issue 9", "list_issue_comments", {"issue_number": "9"}),
+    ("give me a summary of this repo.", "repo_summary", {}),
+])
+def test_match_intent(command, intent, params):
+    assert match_intent(command, REPO) == {"intent": intent, "params": params}
+
+
+def test_quoted_text_keeps_its_case():
+    result = match_intent("create issue with title 'Crash On Start'", REPO)
+    assert result["params"]["title"] == "Crash On Start"
+
+
+def test_full_match_rejects_extra_words():
+    assert match_intent("merge pr 12 and then deploy it", REPO) is None
+    assert match_intent("merge pr 12 and then deploy it", REPO, full=False)["intent"] == "merge_pr"
+
+
+def test_unknown_command():
+    assert match_intent("what is the weather", REPO) is None
+
+
+def test_split_ignores_connectors_in_quotes():
+    pieces, connectors = split_command("create issue with title 'a and b' then list open issues")
+    assert pieces == ["create issue with title 'a and b'", "list open issues"]
+    assert connectors == [" then "]
+
+
+def test_plan_orders_reads_after_writes():
+    plan = match_plan("list open issues and create issue with title 'Bug' and list closed issues", REPO)
+    assert [a["intent"] for a in plan["actions"]] == ["list_items", "create_issue", "list_items"]
+    assert [a["depends_on"] for a in plan["actions"]] == [[], [], [1]]
+
+
+def test_plan_then_is_sequential():
+    plan = match_plan("list branches then view commit abc123", REPO)
+    assert [a["depends_on"] for a in plan["actions"]] == [[], [0]]
+
+
+def test_plan_rejoins_a_command_cut_by_and():
+    # "and description" belongs to the create_pr command, not a second step
+    plan = match_plan("create pr from dev to main with title 'x' and description 'y' and list open issues", REPO)
+    assert [a["intent"] for a in plan["actions"]] == ["create_pr", "list_items"]
+    assert plan["actions"][0]["params"]["body"] == "y"
+
+
+def test_plan_needs_every_step_to_match():
+    assert match_plan("list branches and make me a sandwich", REPO) is None
+    assert match_plan("list branches", REPO) is None
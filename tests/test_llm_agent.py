@@ -0,0 +1,92 @@
+# tests/test_llm_agent.py
+import io
+import json
+import time
+
+import pytest
+import requests
+
+import llm_agent
+from llm_agent import extract_json
+
+
+class FakeResponse:
+    def __init__(self, tokens):
+        self.tokens = tokens
+        self.read = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def raise_for_status(self):
+        pass
+
+    def iter_lines(self, chunk_size=None, decode_unicode=False):
+        for token in self.tokens:
+            self.read += 1
+            yield "data: " + json.dumps({"choices": [{"delta": {"content": token}}]})
+            yield ""
+        yield "data: [DONE]"
+
+
+class FakeSession:
+    def __init__(self, response):
+        self.response = response
+
+    def post(self, *args, **kwargs):
+        return self.response
+
+
+def stream(monkeypatch, text, per_token=1):
+    tokens = [text[i:i + per_token] for i in range(0, len(text), per_token)]
+    response = FakeResponse(tokens + ["\nThanks!"])
+    monkeypatch.setattr(llm_agent, "get_session", lambda: FakeSession(response))
+    result = llm_agent._stream_completion({}, {}, time.monotonic() + 5)
+    return json.loads(result), response
+
+
+@pytest.mark.parametrize("per_token", [1, 3, 7])
+def test_stream_keeps_outer_object(monkeypatch, per_token):
+    reply = '{"intent": "create_pr", "params": {"head": "dev", "base": "main"}}'
+    obj, response = stream(monkeypatch, reply, per_token)
+    assert obj == json.loads(reply)
+    # Stops reading once the object is complete
+    assert response.read < len(response.tokens)
+
+
+def test_stream_keeps_every_action(monkeypatch):
+    reply = ('```json\n{"actions": [{"intent": "list_items", "params": {"item_type": "issues"}}, '
+             '{"intent": "view_file", "params": {"file_path": "a{b}.py"}}]}\n```')
+    obj, _ = stream(monkeypatch, reply)
+    assert len(obj["actions"]) == 2
+    assert obj["actions"][1]["params"]["file_path"] == "a{b}.py"
+
+
+def test_extract_json_ignores_incomplete_object():
+    assert extract_json('{"intent": "x", "params": {"a": 1}') is None
+
+
+def test_extract_json_skips_prose():
+    assert extract_json('Sure {not json} here: {"intent": "x"} done') == {"intent": "x"}
+
+
+def test_extract_json_without_object():
+    assert extract_json("no json here") is None
+
+
+def test_stream_decodes_utf8_without_charset(monkeypatch):
+    reply = '{"intent": "create_issue", "params": {"title": "Größe café ✓"}}'
+    events = "".join(
+        "data: " + json.dumps({"choices": [{"delta": {"content": reply[i:i + 4]}}]}, ensure_ascii=False) + "\n\n"
+        for i in range(0, len(reply), 4)
+    ) + "data: [DONE]\n\n"
+    response = requests.Response()
+    response.status_code = 200
+    response.headers["Content-Type"] = "text/event-stream"
+    response.raw = io.BytesIO(events.encode("utf-8"))
+    monkeypatch.setattr(llm_agent, "get_session", lambda: FakeSession(response))
+    result = json.loads(llm_agent._stream_completion({}, {}, time.monotonic() + 5))
+    assert result["params"]["title"] == "Größe café ✓"
@@ -0,0 +1,110 @@
+# tests/test_rate_scheduler.py
+import threading
+import time
+
+from rate_scheduler import RateScheduler, is_rate_limited, lane, read_lane
+
+
+def wait_queued(scheduler, count, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while sum(scheduler.stats()["queue_depth"].values()) < count:
+        assert time.monotonic() < deadline, "requests never queued"
+        time.sleep(0.005)
+
+
+def test_acquire_spends_budget():
+    scheduler = RateScheduler(limit=100, write_interval=0)
+    scheduler.acquire("interactive")
+    scheduler.acquire("write")
+    stats = scheduler.stats()
+    assert stats["remaining"] == 98
+    assert stats["granted"] == {"interactive": 1, "write": 1, "background": 0}
+
+
+def test_lanes_are_served_by_priority():
+    scheduler = RateScheduler(write_interval=0)
+    scheduler.paused_until = time.time() + 0.3
+    order = []
+
+    def worker(name):
+        scheduler.acquire(name)
+        order.append(name)
+
+    threads = []
+    # Queue lowest priority first so arrival order can't explain the result
+    for name in ("background", "write", "interactive"):
+        thread = threading.Thread(target=worker, args=(name,))
+        thread.start()
+        threads.append(thread)
+        wait_queued(scheduler, len(threads))
+    for thread in threads:
+        thread.join(2)
+    assert order == ["interactive", "write", "background"]
+
+
+def test_rate_limit_response_pauses_every_lane():
+    scheduler = RateScheduler()
+    assert scheduler.observe({"Retry-After": "0.2"}, 429) is True
+    started = time.monotonic()
+    scheduler.acquire("interactive")
+    assert time.monotonic() - started >= 0.15
+    assert scheduler.stats()["throttled"] == 1
+
+
+def test_primary_limit_pauses_until_reset():
+    scheduler = RateScheduler()
+    reset = time.time() + 0.2
+    headers = {"X-RateLimit-Remaining": "0", "X-RateLimit-Limit": "5000", "X-RateLimit-Reset": str(reset)}
+    assert scheduler.observe(headers, 403) is True
+    assert scheduler.paused_until == reset
+
+
+def test_permission_error_is_not_a_rate_limit():
+    scheduler = RateScheduler()
+    assert scheduler.observe({"X-RateLimit-Remaining": "4000"}, 403) is False
+    assert scheduler.paused_until == 0.0
+    assert scheduler.remaining == 4000
+
+
+def test_observe_syncs_budget_from_headers():
+    scheduler = RateScheduler()
+    scheduler.observe({"X-RateLimit-Remaining": "42", "X-RateLimit-Limit": "60", "X-RateLimit-Reset": "123"})
+    assert (scheduler.remaining, scheduler.limit, scheduler.reset_at) == (42, 60, 123.0)
+    # Other resources (search, graphql) have their own budgets
+    scheduler.observe({"X-RateLimit-Resource": "search", "X-RateLimit-Remaining": "1"})
+    assert scheduler.remaining == 42
+
+
+def test_background_leaves_reserve_for_interactive():
+    scheduler = RateScheduler(limit=10, background_reserve=0.5)
+    scheduler.remaining = 5
+    scheduler.reset_at = time.time() + 0.2
+    started = time.monotonic()
+    scheduler.acquire("interactive")
+    assert time.monotonic() - started < 0.1
+    scheduler.acquire("background")
+    # Waited for the bucket to refill at the reset
+    assert time.monotonic() - started >= 0.15
+    assert scheduler.remaining == 9
+
+
+def test_writes_are_spaced():
+    scheduler = RateScheduler(write_interval=0.2)
+    scheduler.acquire("write")
+    started = time.monotonic()
+    scheduler.acquire("write")
+    assert time.monotonic() - started >= 0.15
+
+
+def test_reads_inside_a_write_use_the_interactive_lane():
+    with lane("write"):
+        assert read_lane() == "interactive"
+    with lane("background"):
+        assert read_lane() == "background"
+
+
+def test_is_rate_limited():
+    assert is_rate_limited({"Retry-After": "1"}, 403)
+    assert is_rate_limited({"X-RateLimit-Remaining": "0", "X-RateLimit-Reset": "1"}, 429)
+    assert not is_rate_limited({"Retry-After": "1"}, 500)
+    assert not is_rate_limited({}, 403)
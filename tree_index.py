@@ -0,0 +1,178 @@
+# tree_index.py
+import fnmatch
+import os
+import posixpath
+import re
+import threading
+from urllib.parse import quote
+from github_session import api_request, get_immutable, raise_for_status
+from ttl_cache import TTLCache
+
+# Whole-repo indexes kept in memory; trees never change for a given SHA, so they never expire
+TREE_INDEX_CACHE = int(os.getenv("GITHUB_TREE_INDEX_CACHE", "16"))
+
+_indexes = TTLCache(ttl=0, max_entries=TREE_INDEX_CACHE)
+_commit_trees = TTLCache(ttl=0, max_entries=4096)
+_FULL_SHA = re.compile(r"^[0-9a-f]{40}$")
+_WILDCARD = re.compile(r"[*?\[]")
+
+
+class _Node:
+    __slots__ = ("children", "entry")
+
+    def __init__(self, entry=None):
+        self.children = {}
+        self.entry = entry
+
+
+class TreeIndex:
+    """
+    Every path of one git tree in a trie, for directory listings and
+    prefix / glob / extension queries without further requests.
+    Entries are the git trees API items: path, type (blob, tree, commit), sha, size, mode.
+    """
+
+    def __init__(self, sha, entries):
+        self.sha = sha
+        self._root = _Node({"path": "", "type": "tree", "sha": sha})
+        self._by_extension = None
+        self._lock = threading.Lock()
+        self.count = 0
+        for entry in entries:
+            self._insert(entry)
+
+    def _insert(self, entry):
+        node = self._root
+        for part in entry["path"].split("/"):
+            node = node.children.setdefault(part, _Node())
+        node.entry = entry
+        self.count += 1
+
+    def _node(self, path):
+        node = self._root
+        for part in filter(None, path.strip("/").split("/")):
+            node = node.children.get(part)
+            if node is None:
+                return None
+        return node
+
+    def __len__(self):
+        return self.count
+
+    def get(self, path):
+        """The entry at path, or None"""
+        node = self._node(path)
+        return node.entry if node else None
+
+    def list_dir(self, path=""):
+        """Immediate children of a directory, directories first"""
+        node = self._node(path)
+        if node is None:
+            return []
+        entries = [child.entry for child in node.children.values() if child.entry]
+        return sorted(entries, key=lambda e: (e["type"] != "tree", e["path"]))
+
+    def walk(self, prefix=""):
+        """Every entry below a directory (depth first)"""
+        node = self._node(prefix)
+        stack = [node] if node else []
+        while stack:
+            node = stack.pop()
+            for name in sorted(node.children, reverse=True):
+                child = node.children[name]
+                if child.entry:
+                    yield child.entry
+                stack.append(child)
+
+    def glob(self, pattern):
+        """
+        Paths matching a shell pattern ('*' also crosses '/', as in fnmatch).
+        Only the subtree under the pattern's literal directory prefix is scanned.
+        """
+        wildcard = _WILDCARD.search(pattern)
+        literal = pattern[:wildcard.start()] if wildcard else pattern
+        prefix = posixpath.dirname(literal) if wildcard else posixpath.dirname(pattern)
+        return [e for e in self.walk(prefix) if fnmatch.fnmatchcase(e["path"], pattern)]
+
+    def by_extension(self, extension):
+        """Files with the given extension ('.py' or 'py')"""
+        with self._lock:
+            if self._by_extension is None:
+                groups = {}
+                for entry in self.walk():
+                    if entry["type"] == "blob":
+                        groups.setdefault(posixpath.splitext(entry["path"])[1].lower(), []).append(entry)
+                self._by_extension = groups
+        extension = extension.lower()
+        return list(self._by_extension.get(extension if extension.startswith(".") else f".{extension}", []))
+
+
+def resolve_commit(repo_name, ref):
+    """The commit SHA a branch, tag or SHA points at (one small request unless ref is a full SHA)"""
+    if _FULL_SHA.match(ref):
+        return ref
+    response = api_request("GET", f"/repos/{repo_name}/commits/{quote(ref, safe='')}",
+                           headers={"Accept": "application/vnd.github.sha"})
+    raise_for_status(response)
+    return response.text.strip()
+
+
+def commit_tree_sha(repo_name, commit_sha):
+    """Root tree SHA of a commit; commits are immutable, so this is remembered forever"""
+    key = f"{repo_name.lower()}:{commit_sha}"
+    tree_sha = _commit_trees.get(key)
+    if tree_sha is None:
+        tree_sha = get_immutable("git-commit", commit_sha, f"/repos/{repo_name}/git/commits/{commit_sha}")["tree"]["sha"]
+        _commit_trees.set(key, tree_sha)
+    return tree_sha
+
+
+def loaded_tree_index(repo_name, commit_sha):
+    """The TreeIndex of a commit if it is already in memory, else None (never sends a request)"""
+    tree_sha = _commit_trees.get(f"{repo_name.lower()}:{commit_sha}")
+    return _indexes.get(f"{repo_name.lower()}:{tree_sha}") if tree_sha else None
+
+
+def _fetch_tree(repo_name, tree_sha, recursive):
+    # Immutable by SHA: served from the on-disk object store after the first download
+    return get_immutable("tree-recursive" if recursive else "tree", tree_sha,
+                         f"/repos/{repo_name}/git/trees/{tree_sha}", {"recursive": 1} if recursive else None)
+
+
+def _walk_truncated(repo_name, tree_sha, prefix, entries):
+    """
+    Paged fallback for trees too large for one recursive response:
+    list this level, then load each subtree recursively, splitting further only where needed.
+    """
+    level = _fetch_tree(repo_name, tree_sha, recursive=False)
+    for item in level["tree"]:
+        entries.append(dict(item, path=f"{prefix}{item['path']}"))
+        if item["type"] != "tree":
+            continue
+        sub_prefix = f"{prefix}{item['path']}/"
+        subtree = _fetch_tree(repo_name, item["sha"], recursive=True)
+        if subtree.get("truncated"):
+            _walk_truncated(repo_name, item["sha"], sub_prefix, entries)
+        else:
+            entries.extend(dict(sub, path=f"{sub_prefix}{sub['path']}") for sub in subtree["tree"])
+
+
+def load_tree_index(repo_name, ref="main"):
+    """
+    Return the TreeIndex for ref. The whole tree comes from one
+    git/trees/{sha}?recursive=1 call (paged per subtree if GitHub truncates it),
+    and is cached by tree SHA, so branches at the same commit share one index.
+    """
+    tree_sha = commit_tree_sha(repo_name, resolve_commit(repo_name, ref))
+    key = f"{repo_name.lower()}:{tree_sha}"
+    index = _indexes.get(key)
+    if index is None:
+        tree = _fetch_tree(repo_name, tree_sha, recursive=True)
+        if tree.get("truncated"):
+            entries = []
+            _walk_truncated(repo_name, tree_sha, "", entries)
+        else:
+            entries = tree["tree"]
+        index = TreeIndex(tree_sha, entries)
+        _indexes.set(key, index)
+    return index